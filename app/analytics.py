@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+# Align one price column of several tickers into a float32 ticker x date matrix
+def price_matrix(store, tickers, column='Adj Close'):
+    series = {}
+    for ticker in tickers:
+        data = store.load(ticker)
+        series[ticker] = data.set_index('Date')[column]
+    frame = pd.DataFrame(series).sort_index()
+    dates = frame.index.values
+    return list(frame.columns), dates, frame.to_numpy(dtype=np.float32).T
+
+
+# Carry the last known price forward along each row so gaps do not break returns
+def forward_fill(prices):
+    valid = ~np.isnan(prices)
+    index = np.where(valid, np.arange(prices.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = prices[np.arange(prices.shape[0])[:, None], index]
+    filled[~np.maximum.accumulate(valid, axis=1)] = np.nan
+    return filled
+
+
+def prefix_sum(values):
+    out = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.float64)
+    np.cumsum(values, axis=1, out=out[:, 1:])
+    return out
+
+
+# Daily returns for a ticker x date price matrix, with every statistic the Dashboard
+# needs derived from prefix sums computed once. Any date range or rolling window is
+# then a difference of two columns, so changing the range does not recompute history.
+class ReturnsPanel:
+    def __init__(self, tickers, dates, prices, benchmark=None):
+        self.tickers = list(tickers)
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.prices = forward_fill(np.asarray(prices, dtype=np.float32))
+
+        simple = np.zeros_like(self.prices)
+        logs = np.zeros_like(self.prices)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            simple[:, 1:] = self.prices[:, 1:] / self.prices[:, :-1] - 1
+            logs[:, 1:] = np.log(self.prices[:, 1:] / self.prices[:, :-1])
+        self.valid = np.isfinite(simple) & ~np.isnan(self.prices)
+        self.valid[:, 0] = False
+        self.simple = np.where(self.valid, simple, 0).astype(np.float32)
+        self.logs = np.where(self.valid, logs, 0).astype(np.float32)
+
+        # Beta is measured against one ticker of the panel or, by default, its equal-weight mean
+        if benchmark is None:
+            counts = np.maximum(self.valid.sum(axis=0), 1)
+            self.benchmark = (self.simple.sum(axis=0) / counts).astype(np.float32)
+        else:
+            self.benchmark = self.simple[self.tickers.index(benchmark)]
+
+        self.count = prefix_sum(self.valid.astype(np.float32))
+        self.sum = prefix_sum(self.simple)
+        self.sum_sq = prefix_sum(self.simple * self.simple)
+        self.sum_cross = prefix_sum(self.simple * self.benchmark)
+        self.bench_sum = prefix_sum(self.benchmark[None, :])[0]
+        self.bench_sum_sq = prefix_sum((self.benchmark * self.benchmark)[None, :])[0]
+
+    # Column bounds [lo, hi) of the dates inside [start, end]
+    def bounds(self, start=None, end=None):
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns')))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right'))
+        return lo, max(lo, hi)
+
+    def frame(self, values, lo, hi):
+        return pd.DataFrame(values.T, index=pd.DatetimeIndex(self.dates[lo:hi], name='Date'), columns=self.tickers)
+
+    # Same result as (1 + pct_change).cumprod() - 1, starting from the first price in the range
+    def cumulative_returns(self, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        window = self.prices[:, lo:hi]
+        first_index = np.argmax(~np.isnan(window), axis=1)
+        first = window[np.arange(window.shape[0]), first_index]
+        with np.errstate(invalid='ignore'):
+            cumulative = window / first[:, None] - 1
+        return self.frame(np.nan_to_num(cumulative, nan=0.0), lo, hi)
+
+    def log_returns(self, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        return self.frame(self.logs[:, lo:hi], lo, hi)
+
+    # Annualised rolling volatility from the prefix sums, for every date in the range
+    def rolling_volatility(self, window=21, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        stop = np.arange(lo, hi) + 1
+        begin = np.maximum(stop - window, 0)
+        n = self.count[:, stop] - self.count[:, begin]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = (self.sum[:, stop] - self.sum[:, begin]) / n
+            var = (self.sum_sq[:, stop] - self.sum_sq[:, begin]) / n - mean * mean
+            vol = np.sqrt(np.maximum(var * n / (n - 1), 0) * TRADING_DAYS)
+        vol[n < window] = np.nan
+        return self.frame(vol.astype(np.float32), lo, hi)
+
+    def drawdown(self, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        window = np.nan_to_num(self.prices[:, lo:hi], nan=0.0)
+        peak = np.maximum.accumulate(window, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.where(peak > 0, window / peak - 1, 0)
+        return self.frame(drawdown.astype(np.float32), lo, hi)
+
+    # Annualised return, volatility, Sharpe ratio, beta and max drawdown per ticker over the range
+    def summary(self, start=None, end=None, risk_free=0.0):
+        lo, hi = self.bounds(start, end)
+        # Returns are counted from the second day of the range onward
+        first = min(lo + 1, hi)
+        n = self.count[:, hi] - self.count[:, first]
+        b_sum = self.bench_sum[hi] - self.bench_sum[first]
+        b_sum_sq = self.bench_sum_sq[hi] - self.bench_sum_sq[first]
+        days = max(hi - first, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = (self.sum[:, hi] - self.sum[:, first]) / n
+            var = (self.sum_sq[:, hi] - self.sum_sq[:, first]) / n - mean * mean
+            std = np.sqrt(np.maximum(var * n / (n - 1), 0))
+            b_mean = b_sum / days
+            cov = (self.sum_cross[:, hi] - self.sum_cross[:, first]) / n - mean * b_mean
+            beta = cov / (b_sum_sq / days - b_mean * b_mean)
+            sharpe = (mean - risk_free / TRADING_DAYS) / std * np.sqrt(TRADING_DAYS)
+        return pd.DataFrame({
+            'Annual return': mean * TRADING_DAYS,
+            'Annual volatility': std * np.sqrt(TRADING_DAYS),
+            'Sharpe': sharpe,
+            'Beta': beta,
+            'Max drawdown': self.drawdown(start, end).min().values,
+        }, index=self.tickers)
+
+    # Pairwise correlation of daily returns over the range, from a handful of float32 matrix
+    # products; each pair only uses the days on which both tickers traded
+    def correlation(self, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        first = min(lo + 1, hi)
+        x = self.simple[:, first:hi]
+        mask = self.valid[:, first:hi].astype(np.float32)
+        n = mask @ mask.T
+        sum_x = x @ mask.T
+        sum_sq = (x * x) @ mask.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = n * (x @ x.T) - sum_x * sum_x.T
+            corr = cov / np.sqrt((n * sum_sq - sum_x * sum_x) * (n * sum_sq - sum_x * sum_x).T)
+        return pd.DataFrame(corr, index=self.tickers, columns=self.tickers)
@@ -6,9 +6,10 @@ import yfinance as yf
 import plotly as pt
 import streamlit as st
 from datetime import date
-from prophet import Prophet
 from prophet.plot import plot_plotly 
 from plotly import graph_objs as go
+from models import PROPHET, make_train_frame, make_forecast
+from registry import ModelRegistry
 
 START = "2010-01-01"
 TODAY = date.today().strftime("%Y-%m-%d")
@@ -57,14 +58,14 @@ def plot_raw_data():
 plot_raw_data()
 
 #Forecasting with prophet
-df_train = data[['Date', 'Close']]
-df_train = df_train.rename(columns={"Date": "ds", "Close": "y"})
+df_train = make_train_frame(data)
 
-m = Prophet()
-m.fit(df_train)
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry()
 
-future = m.make_future_dataframe(periods=period)
-forecast = m.predict(future)
+m = get_model_registry().get_or_fit(selected_stocks, PROPHET, df_train)
+forecast = make_forecast(m, PROPHET, df_train, period)
 
 st.subheader("Forecast data")
 st.write(forecast.tail())
@@ -0,0 +1,169 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from config import BACKTEST_DIR, stocks
+from models import PROPHET, NEURALPROPHET, fit_model, make_train_frame, predict_dates
+from batch_forecast import THREAD_VARIABLES
+
+# Walk-forward (rolling-origin) evaluation of the Prediction page models on every ticker.
+# Each fold trains on the history up to a cutoff and scores the next `horizon` days.
+# Folds run on a process pool, read their training slice from a memory-mapped copy of
+# the series written once per ticker, and every finished fold is appended to a checkpoint
+# so an interrupted run picks up where it stopped.
+#
+#   python app/backtest.py --run nightly --models prophet neuralprophet --initial 1500 --step 250 --horizon 30
+
+
+# Write each ticker's dates and closes once, so workers can map them instead of
+# receiving a pickled copy of the data with every fold
+def share_series(store, tickers, run_dir):
+    series_dir = os.path.join(run_dir, 'series')
+    os.makedirs(series_dir, exist_ok=True)
+    for ticker in tickers:
+        ds_path = os.path.join(series_dir, f"{ticker}.ds.npy")
+        y_path = os.path.join(series_dir, f"{ticker}.y.npy")
+        if not os.path.exists(y_path):
+            df = make_train_frame(store.load(ticker))
+            np.save(ds_path, df['ds'].values.astype('datetime64[ns]'))
+            np.save(y_path, df['y'].values.astype(np.float64))
+    return series_dir
+
+
+def cutoffs(length, initial, step, horizon):
+    return list(range(initial, length - horizon + 1, step))
+
+
+def load_slice(series_dir, ticker, lo, hi):
+    ds = np.load(os.path.join(series_dir, f"{ticker}.ds.npy"), mmap_mode='r')
+    y = np.load(os.path.join(series_dir, f"{ticker}.y.npy"), mmap_mode='r')
+    return pd.DataFrame({'ds': ds[lo:hi], 'y': y[lo:hi]})
+
+
+def init_worker(threads_per_worker):
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+
+# Fit on [0, cutoff) and score the forecast on [cutoff, cutoff + horizon)
+def run_fold(series_dir, ticker, model_type, cutoff, horizon, params=None):
+    began = time.perf_counter()
+    train = load_slice(series_dir, ticker, 0, cutoff)
+    test = load_slice(series_dir, ticker, cutoff, cutoff + horizon)
+    m = fit_model(model_type, train, params)
+    forecast = predict_dates(m, model_type, test)
+
+    actual = test['y'].values
+    predicted = forecast['yhat'].values
+    errors = np.abs(actual - predicted)
+    if 'yhat_lower' in forecast.columns:
+        inside = (actual >= forecast['yhat_lower'].values) & (actual <= forecast['yhat_upper'].values)
+        coverage = float(inside.mean())
+    else:
+        coverage = None  # NeuralProphet without quantiles has no interval
+    return {
+        'ticker': ticker, 'model': model_type, 'cutoff': str(train['ds'].iloc[-1].date()),
+        'cutoff_index': cutoff, 'mae': float(errors.mean()), 'mape': float((errors / np.abs(actual)).mean()),
+        'coverage': coverage, 'seconds': time.perf_counter() - began,
+    }
+
+
+def read_checkpoint(path):
+    done = []
+    if os.path.exists(path):
+        with open(path) as handle:
+            for line in handle:
+                try:
+                    done.append(json.loads(line))
+                except ValueError:
+                    pass  # a line cut short by an interruption is simply rerun
+    return done
+
+
+# Per-ticker MAE, MAPE and interval coverage averaged over the folds
+def summarize(results):
+    if not results:
+        return pd.DataFrame(columns=['ticker', 'model', 'folds', 'mae', 'mape', 'coverage'])
+    frame = pd.DataFrame(results)
+    frame['coverage'] = pd.to_numeric(frame['coverage'])
+    summary = frame.groupby(['ticker', 'model']).agg(
+        folds=('cutoff', 'count'), mae=('mae', 'mean'), mape=('mape', 'mean'), coverage=('coverage', 'mean'))
+    return summary.reset_index()
+
+
+def run(run_name, tickers=stocks, model_types=(PROPHET,), initial=1500, step=250, horizon=30,
+        workers=None, threads_per_worker=1, store=None):
+    from store import PriceStore
+
+    tickers = list(dict.fromkeys(tickers))
+    run_dir = os.path.join(BACKTEST_DIR, run_name)
+    os.makedirs(run_dir, exist_ok=True)
+    checkpoint = os.path.join(run_dir, 'folds.jsonl')
+
+    series_dir = share_series(store or PriceStore(), tickers, run_dir)
+    results = read_checkpoint(checkpoint)
+    done = {(row['ticker'], row['model'], row['cutoff_index']) for row in results}
+
+    folds = []
+    for ticker in tickers:
+        length = len(np.load(os.path.join(series_dir, f"{ticker}.y.npy"), mmap_mode='r'))
+        for model_type in model_types:
+            for cutoff in cutoffs(length, initial, step, horizon):
+                if (ticker, model_type, cutoff) not in done:
+                    folds.append((ticker, model_type, cutoff))
+    print(f"{len(done)} folds already done, {len(folds)} to run")
+
+    for name in THREAD_VARIABLES:
+        os.environ[name] = str(threads_per_worker)
+    with open(checkpoint, 'a') as handle, \
+            ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                mp_context=multiprocessing.get_context('spawn'),
+                                initializer=init_worker, initargs=(threads_per_worker,)) as pool:
+        futures = {pool.submit(run_fold, series_dir, ticker, model_type, cutoff, horizon): (ticker, model_type, cutoff)
+                   for ticker, model_type, cutoff in folds}
+        for future in as_completed(futures):
+            ticker, model_type, cutoff = futures[future]
+            try:
+                row = future.result()
+            except Exception as exc:
+                print(f"{ticker:<6} {model_type:<14} fold {cutoff:>5} FAILED ({exc!r})")
+                continue
+            handle.write(json.dumps(row) + '\n')
+            handle.flush()
+            results.append(row)
+            print(f"{ticker:<6} {model_type:<14} {row['cutoff']}  MAE {row['mae']:8.3f}  "
+                  f"MAPE {row['mape']:6.2%}  {row['seconds']:6.1f}s")
+
+    summary = summarize(results)
+    summary.to_csv(os.path.join(run_dir, 'summary.csv'), index=False)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the Prophet and NeuralProphet models")
+    parser.add_argument('--run', default='default', help="Run name; rerunning the same name resumes it")
+    parser.add_argument('--tickers', nargs='*', default=list(stocks))
+    parser.add_argument('--models', nargs='*', default=[PROPHET], choices=[PROPHET, NEURALPROPHET])
+    parser.add_argument('--initial', type=int, default=1500, help="Trading days in the first training window")
+    parser.add_argument('--step', type=int, default=250, help="Trading days between cutoffs")
+    parser.add_argument('--horizon', type=int, default=30, help="Trading days scored after each cutoff")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--csv-source', default=None, help="Read prices from a folder of <TICKER>_data.csv files")
+    args = parser.parse_args()
+
+    from store import PriceStore, CsvProvider
+    store = PriceStore(CsvProvider(args.csv_source) if args.csv_source else None)
+    summary = run(args.run, args.tickers, args.models, args.initial, args.step, args.horizon,
+                  args.workers, args.threads_per_worker, store)
+    print()
+    print(summary.to_string(index=False))
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from analytics import forward_fill
+from models import FORECAST_COLUMNS
+
+# Fast statistical forecasts for every ticker at once. Each method works on the whole
+# ticker x trading-day price matrix with NumPy array operations, so fitting the universe
+# takes well under a second. Output frames use the same ds/yhat/yhat_lower/yhat_upper
+# columns as the Prophet and NeuralProphet forecasts.
+
+METHODS = {
+    'drift': 'Drift',
+    'holt': 'Holt (EWMA level and trend)',
+    'seasonal_naive': 'Seasonal naive (one year)',
+    'ridge': 'Ridge on lagged returns',
+}
+
+HOLT_ALPHA = 0.3      # level smoothing
+HOLT_BETA = 0.05      # trend smoothing
+SEASON = 252          # trading days in a year
+RIDGE_LAGS = 5
+RIDGE_PENALTY = 1e-4
+INTERVAL_Z = 1.2816   # 80% interval, Prophet's default interval_width
+
+
+class BaselineForecaster:
+    def __init__(self, tickers, dates, prices):
+        self.tickers = list(tickers)
+        self.position = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.dates = pd.DatetimeIndex(dates)
+        prices = forward_fill(np.asarray(prices, dtype=np.float64))
+        self.first = np.argmax(~np.isnan(prices), axis=1)
+        # Before a ticker's first trade its price is held at the first known value
+        first_price = prices[np.arange(len(prices)), self.first]
+        self.prices = np.where(np.isnan(prices), first_price[:, None], prices)
+        self.results = {}
+
+    # One-step-ahead fitted values (N, T) and forecasts for `steps` trading days (N, steps)
+    def drift(self, steps):
+        n, t = self.prices.shape
+        span = np.maximum(t - 1 - self.first, 1)
+        slope = (self.prices[:, -1] - self.prices[np.arange(n), self.first]) / span
+        fitted = np.full_like(self.prices, np.nan)
+        fitted[:, 1:] = self.prices[:, :-1] + slope[:, None]
+        future = self.prices[:, -1:] + slope[:, None] * np.arange(1, steps + 1)
+        return fitted, future
+
+    def holt(self, steps):
+        level = self.prices[:, 0].copy()
+        trend = np.zeros_like(level)
+        fitted = np.full_like(self.prices, np.nan)
+        for i in range(1, self.prices.shape[1]):
+            fitted[:, i] = level + trend
+            previous = level
+            level = HOLT_ALPHA * self.prices[:, i] + (1 - HOLT_ALPHA) * (level + trend)
+            trend = HOLT_BETA * (level - previous) + (1 - HOLT_BETA) * trend
+        future = level[:, None] + trend[:, None] * np.arange(1, steps + 1)
+        return fitted, future
+
+    def seasonal_naive(self, steps):
+        fitted = np.full_like(self.prices, np.nan)
+        fitted[:, SEASON:] = self.prices[:, :-SEASON]
+        last_season = self.prices[:, -SEASON:]
+        future = np.tile(last_season, (1, steps // SEASON + 1))[:, :steps]
+        return fitted, future
+
+    # Autoregression of daily returns on their last RIDGE_LAGS values, one ridge
+    # regression per ticker solved as a single batched linear system
+    def ridge(self, steps):
+        returns = np.zeros_like(self.prices)
+        returns[:, 1:] = self.prices[:, 1:] / self.prices[:, :-1] - 1
+        lagged = sliding_window_view(returns[:, :-1], RIDGE_LAGS, axis=1)   # (N, T - lags, lags)
+        target = returns[:, RIDGE_LAGS:]
+        xtx = np.einsum('ntp,ntq->npq', lagged, lagged) + RIDGE_PENALTY * lagged.shape[1] * np.eye(RIDGE_LAGS)
+        xty = np.einsum('ntp,nt->np', lagged, target)
+        coef = np.linalg.solve(xtx, xty[..., None])[..., 0]                 # (N, lags)
+
+        fitted = np.full_like(self.prices, np.nan)
+        fitted[:, RIDGE_LAGS:] = self.prices[:, RIDGE_LAGS - 1:-1] * (1 + np.einsum('ntp,np->nt', lagged, coef))
+
+        window = returns[:, -RIDGE_LAGS:].copy()
+        growth = np.ones(len(self.prices))
+        future = np.empty((len(self.prices), steps))
+        for h in range(steps):
+            step = np.einsum('np,np->n', window, coef)
+            growth *= 1 + step
+            future[:, h] = self.prices[:, -1] * growth
+            window = np.concatenate([window[:, 1:], step[:, None]], axis=1)
+        return fitted, future
+
+    # Fitted values, forecasts and residual spread for every ticker, computed once per method
+    def run(self, method, steps):
+        cached = self.results.get(method)
+        if cached is None or cached[1].shape[1] < steps:
+            fitted, future = getattr(self, method)(steps)
+            residuals = self.prices - fitted
+            for i, first in enumerate(self.first):
+                residuals[i, :first + 1] = np.nan
+            sigma = np.nanstd(residuals, axis=1)
+            cached = (fitted, future, sigma)
+            self.results[method] = cached
+        return cached
+
+    # Weekdays in the `period` calendar days after the last price
+    def future_dates(self, period):
+        last = self.dates[-1].to_datetime64().astype('datetime64[D]')
+        days = last + np.arange(1, period + 1)
+        return days[np.is_busday(days)].astype('datetime64[ns]')
+
+    # Forecast frame for one ticker: fitted history plus `period` calendar days ahead
+    def forecast(self, ticker, method='drift', period=365, future_dates=None):
+        future_dates = self.future_dates(period) if future_dates is None else future_dates
+        steps = len(future_dates)
+        fitted, future, sigma = self.run(method, max(steps, 1))
+        i = self.position[ticker]
+
+        history = slice(self.first[i], None)
+        yhat = np.concatenate([fitted[i, history], future[i, :steps]])
+        spread = np.concatenate([np.full(len(self.dates) - self.first[i], sigma[i]),
+                                 sigma[i] * np.sqrt(np.arange(1, steps + 1))]) * INTERVAL_Z
+        frame = pd.DataFrame({
+            'ds': np.concatenate([self.dates[history].values, future_dates]),
+            'yhat': yhat,
+            'yhat_lower': yhat - spread,
+            'yhat_upper': yhat + spread,
+            'trend': yhat,
+            'yearly': np.nan,
+            'weekly': np.nan,
+        })
+        return frame[FORECAST_COLUMNS]
+
+    def forecast_all(self, method='drift', period=365):
+        future_dates = self.future_dates(period)
+        return {ticker: self.forecast(ticker, method, period, future_dates) for ticker in self.tickers}
@@ -0,0 +1,214 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from config import FORECAST_DIR, STORE_DIR, stocks
+from models import (PROPHET, NEURALPROPHET, NEURALPROPHET_GLOBAL, make_train_frame, make_forecast,
+                    standard_forecast, make_panel_frame, make_panel_forecast)
+from forecast_store import ForecastStore, MAX_YEARS, as_of_date, horizon
+
+# Headless forecasts for the whole universe, one ticker per task on a process pool,
+# written to a single Parquet file as each ticker finishes. The global NeuralProphet
+# model is instead trained once on every ticker and predicted in batches.
+#
+#   python app/batch_forecast.py --models prophet neuralprophet --years 4 --output data/forecasts/all.parquet
+#   python app/batch_forecast.py --models neuralprophet_global --threads-per-worker 8
+
+THREAD_VARIABLES = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+# Per-worker state, created once by init_worker
+worker = {}
+
+
+# Cap the threads torch may start inside each worker and open the worker's store and registry
+def init_worker(threads_per_worker, csv_source, store_dir=STORE_DIR):
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+    from registry import ModelRegistry
+    from store import PriceStore, CsvProvider
+    worker['store'] = PriceStore(CsvProvider(csv_source) if csv_source else None, store_dir)
+    worker['registry'] = ModelRegistry()
+
+
+# Same steps as the Prediction page: ds/y frame, fit (or registry hit), future frame, predict.
+# Also returns the hyperparameters used, which are stored with the forecast.
+def forecast_ticker(ticker, model_type, period):
+    from registry import resolve_params
+
+    began = time.perf_counter()
+    data = worker['store'].load(ticker)
+    if data.empty:
+        raise ValueError(f"No price data for {ticker}")
+    df_train = make_train_frame(data)
+    params = resolve_params(ticker, model_type)
+    m = worker['registry'].get_or_fit(ticker, model_type, df_train, params)
+    forecast = standard_forecast(make_forecast(m, model_type, df_train, period), model_type)
+    return forecast, as_of_date(data), time.perf_counter() - began, params
+
+
+# Streams forecast frames into one Parquet file, moved into place when complete
+class ForecastFile:
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.writer = None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def append(self, ticker, model_type, forecast):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        forecast = forecast.copy()
+        forecast.insert(0, 'model', model_type)
+        forecast.insert(0, 'ticker', ticker)
+        table = pa.Table.from_pandas(forecast, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.tmp_path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    # Returns whether a file was published; nothing is written when every ticker failed
+    def close(self):
+        if self.writer is None:
+            return False
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+        return True
+
+    # Drop the partial file of a run that failed or was interrupted, leaving any previous output in place
+    def discard(self):
+        if self.writer is not None:
+            self.writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+# One training job for the whole universe: a single NeuralProphet fitted on the stacked
+# panel, then batched predictions. Runs in this process with all its threads.
+def run_global(tickers, period, output_file, threads=None, csv_source=None, store=None, batch_size=20,
+               store_dir=STORE_DIR, output_period=None):
+    from registry import ModelRegistry, forecast_params
+    from store import PriceStore, CsvProvider
+
+    try:
+        import torch
+        torch.set_num_threads(threads or os.cpu_count())
+    except ImportError:
+        pass
+
+    report = []
+    prices = PriceStore(CsvProvider(csv_source) if csv_source else None, store_dir)
+    frames = {}
+    for ticker in tickers:
+        data = prices.load(ticker)
+        if data.empty:
+            report.append((ticker, NEURALPROPHET_GLOBAL, None, repr(ValueError(f"No price data for {ticker}"))))
+        else:
+            frames[ticker] = data
+    if not frames:
+        return report
+
+    began = time.perf_counter()
+    df_panel = make_panel_frame(frames)
+    params = forecast_params(None, NEURALPROPHET_GLOBAL)
+    m = ModelRegistry().get_or_fit_global(df_panel, params)
+    print(f"{'*':<6} {NEURALPROPHET_GLOBAL:<20} {time.perf_counter() - began:7.2f}s  "
+          f"trained on {len(frames)} tickers, {len(df_panel)} rows")
+
+    names = list(frames)
+    for i in range(0, len(names), batch_size):
+        batch = names[i:i + batch_size]
+        began = time.perf_counter()
+        forecasts = make_panel_forecast(m, df_panel, batch, period)
+        seconds = (time.perf_counter() - began) / len(batch)
+        for ticker in batch:
+            forecast, as_of = forecasts[ticker], as_of_date(frames[ticker])
+            if store is not None:
+                store.put(ticker, NEURALPROPHET_GLOBAL, as_of, forecast, params)
+            output_file.append(ticker, NEURALPROPHET_GLOBAL, horizon(forecast, as_of, output_period or period))
+            report.append((ticker, NEURALPROPHET_GLOBAL, seconds, None))
+            print(f"{ticker:<6} {NEURALPROPHET_GLOBAL:<20} {seconds:7.2f}s")
+    return report
+
+
+def run(tickers=stocks, model_types=(PROPHET,), years=MAX_YEARS, output=None, workers=None, threads_per_worker=1,
+        csv_source=None, publish=False, store_dir=STORE_DIR):
+    tickers = list(dict.fromkeys(tickers))
+    workers = workers or os.cpu_count()
+    # Published forecasts are served for every horizon the app offers, so they are always made
+    # for the longest one; the output file keeps the requested years
+    period = max(years, MAX_YEARS) * 365 if publish else years * 365
+    output = output or os.path.join(FORECAST_DIR, f"forecasts_{date.today():%Y-%m-%d}.parquet")
+    per_ticker = [model_type for model_type in model_types if model_type != NEURALPROPHET_GLOBAL]
+
+    # BLAS/OpenMP read their thread limits at import time, so set them before the
+    # spawned workers start; N workers with one thread each then use N cores
+    for name in THREAD_VARIABLES:
+        os.environ[name] = str(threads_per_worker)
+
+    store = ForecastStore() if publish else None
+    output_file = ForecastFile(output)
+    report = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker, initargs=(threads_per_worker, csv_source, store_dir)) as pool:
+            futures = {pool.submit(forecast_ticker, ticker, model_type, period): (ticker, model_type)
+                       for model_type in per_ticker for ticker in tickers}
+            for future in as_completed(futures):
+                ticker, model_type = futures[future]
+                try:
+                    forecast, as_of, seconds, params = future.result()
+                except Exception as exc:
+                    report.append((ticker, model_type, None, repr(exc)))
+                    print(f"{ticker:<6} {model_type:<20} FAILED ({exc!r})")
+                    continue
+                if store is not None:
+                    # Make the forecast available to the Prediction page
+                    store.put(ticker, model_type, as_of, forecast, params)
+                # Stream each finished ticker to disk instead of collecting every frame
+                output_file.append(ticker, model_type, horizon(forecast, as_of, years * 365))
+                report.append((ticker, model_type, seconds, None))
+                print(f"{ticker:<6} {model_type:<20} {seconds:7.2f}s")
+
+        if NEURALPROPHET_GLOBAL in model_types:
+            report.extend(run_global(tickers, period, output_file, threads_per_worker * workers,
+                                     csv_source, store, store_dir=store_dir, output_period=years * 365))
+    except BaseException:
+        output_file.discard()
+        raise
+    written = output_file.close()
+    (store or ForecastStore()).prune()
+    return output if written else None, report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Precompute forecasts for the stock universe")
+    parser.add_argument('--tickers', nargs='*', default=list(stocks))
+    parser.add_argument('--models', nargs='*', default=[PROPHET], choices=[PROPHET, NEURALPROPHET, NEURALPROPHET_GLOBAL])
+    parser.add_argument('--years', type=int, default=MAX_YEARS)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--workers', type=int, default=None, help="Defaults to one worker per core")
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--csv-source', default=None, help="Read prices from a folder of <TICKER>_data.csv files")
+    parser.add_argument('--publish', action='store_true', help="Also write each forecast to the store the Prediction page reads")
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    output, report = run(args.tickers, args.models, args.years, args.output, args.workers,
+                         args.threads_per_worker, args.csv_source, args.publish)
+    failed = [f"{ticker}/{model_type}" for ticker, model_type, _, error in report if error is not None]
+    if output is not None:
+        print(f"\n{len(report) - len(failed)}/{len(report)} forecasts written to {output} "
+              f"in {time.perf_counter() - began:.1f}s")
+    else:
+        print(f"\nNo forecasts written in {time.perf_counter() - began:.1f}s")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    if failed or output is None:
+        raise SystemExit(1)
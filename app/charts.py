@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+from plotly import graph_objs as go
+from plotly.subplots import make_subplots
+
+# Chart building for long price histories. Each series is decimated on the server to
+# about as many points as the chart has pixels across the visible range, so the payload
+# sent to the browser and its render time stay flat whatever the length of the history.
+# Up to a few points per pixel, LTTB (largest triangle three buckets) keeps the visual
+# shape of the line; denser series keep the minimum and maximum of each pixel-wide bucket,
+# so spikes survive. Figures with many points switch to WebGL traces.
+
+CHART_WIDTH = 1200       # plot width in pixels of the app's wide layout
+MINMAX_DENSITY = 4       # points per pixel above which min/max buckets replace LTTB
+WEBGL_THRESHOLD = 5000   # points in a figure above which Scattergl draws faster than SVG
+CLOUD_POINTS = 5000      # random portfolios drawn on the frontier chart
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+# Visible range choices, as offsets back from the last date (None shows everything)
+RANGES = {
+    '1M': pd.DateOffset(months=1),
+    '6M': pd.DateOffset(months=6),
+    '1Y': pd.DateOffset(years=1),
+    '5Y': pd.DateOffset(years=5),
+    'Max': None,
+}
+
+
+# Indices of the n_out points LTTB keeps: the first and last point, then from each bucket
+# the point forming the largest triangle with the previous pick and the next bucket's mean.
+# LTTB only runs on a few points per bucket, where plain Python beats NumPy's per-call cost.
+def lttb_indices(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64), nan=np.nanmean(y))
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sum_x = np.concatenate([[0.0], np.cumsum(x)])
+    sum_y = np.concatenate([[0.0], np.cumsum(y)])
+    counts = np.diff(edges)
+    mean_x = np.append((sum_x[edges[2:]] - sum_x[edges[1:-1]]) / counts[1:], x[-1]).tolist()
+    mean_y = np.append((sum_y[edges[2:]] - sum_y[edges[1:-1]]) / counts[1:], y[-1]).tolist()
+    edges, xs, ys = edges.tolist(), x.tolist(), y.tolist()
+
+    picked = [0]
+    a = 0
+    for i in range(n_out - 2):
+        ax, ay, cx, cy = xs[a], ys[a], mean_x[i], mean_y[i]
+        best, best_area = edges[i], -1.0
+        for j in range(edges[i], edges[i + 1]):
+            area = abs((ax - cx) * (ys[j] - ay) - (ax - xs[j]) * (cy - ay))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        picked.append(a)
+    picked.append(n - 1)
+    return np.array(picked, dtype=np.int64)
+
+
+# Indices of the lowest and highest point of each of about n_out // 2 equal buckets, plus both ends
+def minmax_indices(y, n_out):
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    size = -(-n // max(n_out // 2, 1))
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    missing = np.isnan(rows)
+    base = np.arange(buckets) * size
+    lows = base + np.argmin(np.where(missing, np.inf, rows), axis=1)
+    highs = base + np.argmax(np.where(missing, -np.inf, rows), axis=1)
+    picked = np.unique(np.concatenate([lows, highs, [0, n - 1]]))
+    return picked[picked < n]
+
+
+# Positions [lo, hi) of the points inside x_range, with one neighbour on each side so
+# lines run to the edges of the plot
+def visible_bounds(x, x_range):
+    if x_range is None:
+        return 0, len(x)
+    x = np.asarray(x, dtype='datetime64[ns]')
+    lo = np.searchsorted(x, np.datetime64(pd.Timestamp(x_range[0]), 'ns'), side='left')
+    hi = np.searchsorted(x, np.datetime64(pd.Timestamp(x_range[1]), 'ns'), side='right')
+    return max(lo - 1, 0), min(hi + 1, len(x))
+
+
+# Indices of the points to draw for one series, chosen from the visible range and pixel width
+def decimate_indices(x, y, x_range=None, width=CHART_WIDTH):
+    lo, hi = visible_bounds(x, x_range)
+    n = hi - lo
+    if n <= width:
+        return np.arange(lo, hi)
+    x_num = np.asarray(x[lo:hi], dtype='datetime64[ns]').astype(np.int64)
+    y = np.asarray(y[lo:hi], dtype=np.float64)
+    if n > MINMAX_DENSITY * width:
+        return lo + minmax_indices(y, 2 * width)
+    return lo + lttb_indices(x_num, y, width)
+
+
+# With a visible range, a pass over the whole history at the same width is merged in, so the
+# range slider, and the plot once the slider is dragged out, still show every year at about
+# twice the points of the visible window alone
+def chart_indices(x, y, x_range=None, width=CHART_WIDTH):
+    picked = decimate_indices(x, y, x_range, width)
+    if x_range is None:
+        return picked
+    return np.union1d(picked, decimate_indices(x, y, None, width))
+
+
+def x_range_for(dates, choice):
+    offset = RANGES[choice]
+    if offset is None or len(dates) == 0:
+        return None
+    last = pd.Timestamp(dates.iloc[-1] if hasattr(dates, 'iloc') else dates[-1])
+    return last - offset, last
+
+
+def scatter_type(points):
+    return go.Scattergl if points > WEBGL_THRESHOLD else go.Scatter
+
+
+# Price history with any of the OHLCV fields; Volume is drawn as bars on a second axis
+def price_chart(data, fields=('Close',), x_range=None, width=CHART_WIDTH, title='Time Series Data'):
+    fields = [field for field in fields if field in data.columns] or ['Close']
+    dates = data['Date'].values
+    series = {field: chart_indices(dates, data[field].values, x_range, width) for field in fields}
+    lines = [field for field in fields if field != 'Volume']
+    trace = scatter_type(sum(len(series[field]) for field in lines))
+
+    fig = make_subplots(specs=[[{'secondary_y': True}]]) if 'Volume' in fields else go.Figure()
+    for field in lines:
+        idx = series[field]
+        fig.add_trace(trace(x=dates[idx], y=data[field].values[idx], name=f"Stock_{field.lower().replace(' ', '_')}"))
+    if 'Volume' in fields:
+        idx = series['Volume']
+        fig.add_trace(go.Bar(x=dates[idx], y=data['Volume'].values[idx], name='Volume', opacity=0.3,
+                             marker=dict(color='gray')), secondary_y=True)
+    fig.layout.update(title_text=title, xaxis_rangeslider_visible=True)
+    if x_range is not None:
+        fig.update_xaxes(range=list(x_range))
+    return fig
+
+
+# Forecast against the actual prices. The prediction and its interval share one set of
+# indices, so the filled band lines up with the line it surrounds.
+def forecast_chart(data, forecast, width=CHART_WIDTH):
+    actual = decimate_indices(data['Date'].values, data['Close'].values, width=width)
+    predicted = decimate_indices(forecast['ds'].values, forecast['yhat'].values, width=width)
+    has_band = forecast['yhat_upper'].notna().any()
+    trace = scatter_type(len(actual) + len(predicted) * (3 if has_band else 1))
+
+    ds = forecast['ds'].values[predicted]
+    fig = go.Figure()
+    fig.add_trace(trace(x=data['Date'].values[actual], y=data['Close'].values[actual], name='Actual',
+                        mode='markers', marker=dict(size=3, color='black')))
+    if has_band:
+        fig.add_trace(trace(x=ds, y=forecast['yhat_upper'].values[predicted], name='Upper bound',
+                            line=dict(width=0), showlegend=False))
+        fig.add_trace(trace(x=ds, y=forecast['yhat_lower'].values[predicted], name='Lower bound',
+                            line=dict(width=0), fill='tonexty', fillcolor='rgba(0, 114, 178, 0.2)',
+                            showlegend=False))
+    fig.add_trace(trace(x=ds, y=forecast['yhat'].values[predicted], name='Predicted', line=dict(color='#0072B2')))
+    fig.layout.update(title_text='Forecast', xaxis_rangeslider_visible=True)
+    return fig
+
+
+# Each forecast component (trend and seasonalities) on its own row
+def components_chart(forecast, width=CHART_WIDTH):
+    components = [col for col in ['trend', 'yearly', 'weekly'] if forecast[col].notna().any()]
+    fig = make_subplots(rows=len(components), cols=1, subplot_titles=components)
+    picks = {col: decimate_indices(forecast['ds'].values, forecast[col].values, width=width) for col in components}
+    trace = scatter_type(sum(len(idx) for idx in picks.values()))
+    for row, col in enumerate(components, 1):
+        idx = picks[col]
+        fig.add_trace(trace(x=forecast['ds'].values[idx], y=forecast[col].values[idx], name=col,
+                            line=dict(color='#0072B2')), row=row, col=1)
+    fig.layout.update(height=250 * len(components), showlegend=False)
+    return fig
+
+
+# Random portfolios coloured by Sharpe ratio, the efficient frontier and highlighted portfolios.
+# Only a sample of the cloud is sent to the browser; the frontier is computed from all of it.
+def frontier_chart(cloud, edge, picks, points=CLOUD_POINTS, seed=0):
+    n = len(cloud['returns'])
+    shown = np.sort(np.random.default_rng(seed).choice(n, min(points, n), replace=False))
+    fig = go.Figure()
+    fig.add_trace(scatter_type(len(shown))(
+        x=cloud['volatility'][shown], y=cloud['returns'][shown], mode='markers', name='Random portfolios',
+        marker=dict(size=3, color=cloud['sharpe'][shown], colorscale='Viridis', showscale=True,
+                    colorbar=dict(title='Sharpe'))))
+    fig.add_trace(go.Scatter(x=edge[0], y=edge[1], mode='lines', name='Efficient frontier',
+                             line=dict(color='#0072B2', width=3)))
+    for name, (volatility, expected) in picks.items():
+        fig.add_trace(go.Scatter(x=[volatility], y=[expected], mode='markers', name=name,
+                                 marker=dict(size=14, symbol='star', line=dict(width=1, color='black'))))
+    fig.layout.update(title_text='Efficient frontier', xaxis_title='Annual volatility', yaxis_title='Annual return',
+                      xaxis_tickformat='.0%', yaxis_tickformat='.0%')
+    return fig
+
+
+# Percentile bands of simulated portfolio values: the outer band, the inner band and the median
+def fan_chart(dates, bands, quantiles):
+    fig = go.Figure()
+    outer, inner = (0, len(quantiles) - 1), (1, len(quantiles) - 2)
+    for (lo, hi), alpha in [(outer, 0.15), (inner, 0.3)]:
+        fig.add_trace(go.Scatter(x=dates, y=bands[hi], line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=dates, y=bands[lo], line=dict(width=0), fill='tonexty',
+                                 fillcolor=f'rgba(0, 114, 178, {alpha})', name=f'{quantiles[lo]}-{quantiles[hi]}%'))
+    fig.add_trace(go.Scatter(x=dates, y=bands[len(quantiles) // 2], name='Median', line=dict(color='#0072B2')))
+    fig.layout.update(title_text='Simulated portfolio value', yaxis_title='Value of 1 invested')
+    return fig
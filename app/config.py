@@ -0,0 +1,46 @@
+import os
+
+# Shared settings for the app and the offline jobs that feed it
+START = "2010-01-01"
+
+# Data folders, resolved relative to the repository root so jobs can run from anywhere
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+RAW_DIR = os.path.join(DATA_DIR, "raw")
+CLEAN_DIR = os.path.join(DATA_DIR, "clean")
+STORE_DIR = os.path.join(DATA_DIR, "store")
+MODEL_DIR = os.path.join(DATA_DIR, "models")
+FORECAST_DIR = os.path.join(DATA_DIR, "forecasts")
+MATRIX_DIR = os.path.join(DATA_DIR, "matrix")
+BACKTEST_DIR = os.path.join(DATA_DIR, "backtests")
+INTRADAY_DIR = os.path.join(DATA_DIR, "intraday")
+TUNING_DIR = os.path.join(DATA_DIR, "tuning")
+PREWARM_DIR = os.path.join(DATA_DIR, "prewarm")
+
+stocks = (
+    'TSLA', 'AAPL', 'MSFT', 'AMZN', 'GOOGL', 'GOOG', 'FB', 'BRK.B', 'JNJ', 'NVDA', 'JPM', 'UNH', 'V', 'PG', 'HD',
+    'MA', 'PFE', 'BAC', 'DIS', 'VZ', 'KO', 'NFLX', 'INTC', 'MRK', 'CSCO', 'T', 'CMCSA', 'CVX', 'XOM', 'PEP', 'ABT',
+    'ADBE', 'WMT', 'NKE', 'PYPL', 'TMO', 'CRM', 'ORCL', 'MCD', 'MDT', 'COST', 'AXP', 'LLY', 'BMY', 'QCOM',
+    'DHR', 'TXN', 'UNP', 'UPS', 'LIN', 'SBUX', 'HON', 'AVGO', 'AMGN', 'CAT', 'AMT', 'GILD', 'GS', 'SCHW',
+    'BKNG', 'MS', 'ISRG', 'SPGI', 'ZTS', 'INTU', 'FIS', 'USB', 'RTX', 'DE', 'C', 'BLK', 'PLD', 'MMM', 'IBM', 'NOW',
+    'SYK', 'CB', 'MO', 'EL', 'BA', 'ADP', 'CI', 'CL', 'SO', 'MRNA', 'LMT', 'TGT', 'ADI', 'GE', 'MDT', 'ABBV', 'WFC',
+    'CVS', 'LRCX', 'WM', 'PGR', 'EW', 'ITW', 'CME', 'NEE', 'AON', 'FISV', 'TRV'
+)
+
+# Sector of every stock, for tuning hyperparameters on a group of similar series
+sectors = {
+    'Information Technology': ('AAPL', 'MSFT', 'NVDA', 'INTC', 'CSCO', 'ADBE', 'CRM', 'ORCL', 'QCOM', 'TXN', 'AVGO',
+                               'INTU', 'IBM', 'NOW', 'ADI', 'LRCX'),
+    'Communication Services': ('GOOGL', 'GOOG', 'FB', 'DIS', 'VZ', 'NFLX', 'T', 'CMCSA'),
+    'Consumer Discretionary': ('TSLA', 'AMZN', 'HD', 'NKE', 'MCD', 'SBUX', 'BKNG'),
+    'Consumer Staples': ('PG', 'KO', 'PEP', 'WMT', 'COST', 'MO', 'EL', 'CL', 'TGT'),
+    'Health Care': ('JNJ', 'UNH', 'PFE', 'MRK', 'ABT', 'TMO', 'MDT', 'LLY', 'BMY', 'DHR', 'AMGN', 'GILD', 'ISRG', 'ZTS',
+                    'SYK', 'CI', 'MRNA', 'ABBV', 'CVS', 'EW'),
+    'Financials': ('BRK.B', 'JPM', 'V', 'MA', 'BAC', 'PYPL', 'AXP', 'GS', 'SCHW', 'MS', 'SPGI', 'FIS', 'USB', 'C', 'BLK',
+                   'CB', 'WFC', 'PGR', 'CME', 'AON', 'FISV', 'TRV'),
+    'Industrials': ('UNP', 'UPS', 'HON', 'CAT', 'RTX', 'DE', 'MMM', 'BA', 'ADP', 'LMT', 'GE', 'WM', 'ITW'),
+    'Energy': ('CVX', 'XOM'),
+    'Materials': ('LIN',),
+    'Real Estate': ('AMT', 'PLD'),
+    'Utilities': ('SO', 'NEE'),
+}
@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from aiohttp import web
+
+import metrics
+import usage
+from batch_forecast import THREAD_VARIABLES, init_worker, forecast_ticker
+from config import stocks
+from models import PROPHET, NEURALPROPHET, NEURALPROPHET_GLOBAL
+from forecast_store import ForecastStore, MAX_YEARS, as_of_date, comparable, horizon
+from registry import forecast_params
+
+# Headless forecasts over HTTP, built on the same price store, model registry and forecast
+# store as the Prediction page. Concurrent requests for the same forecast share one fit,
+# misses for different tickers are collected for a few milliseconds and sent to a process
+# pool in batches, and new work is refused with 503 once too much is queued. As on the
+# Prediction page, global NeuralProphet forecasts are only served once an offline job built them.
+#
+#   python app/forecast_api.py --port 8000 --workers 4
+#   curl 'localhost:8000/forecast/AAPL?model=prophet&years=1'
+#   curl 'localhost:8000/forecast/AAPL?model=neuralprophet_global&format=arrow' -o aapl.arrow
+
+MODELS = (PROPHET, NEURALPROPHET, NEURALPROPHET_GLOBAL)
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Seconds a ticker's as-of date is reused before the price store is read again
+AS_OF_TTL = 60
+# Seconds a client is asked to wait after a 503
+RETRY_AFTER = 5
+
+
+class Overloaded(Exception):
+    pass
+
+
+# Runs in a pool worker: forecasts for a batch of tickers of one model, as
+# {ticker: (forecast, as_of, params, None)} or {ticker: (None, None, None, error)}
+def forecast_batch(tickers, model_type, period):
+    results = {}
+    for ticker in tickers:
+        try:
+            forecast, as_of, _, params = forecast_ticker(ticker, model_type, period)
+            results[ticker] = (forecast, as_of, params, None)
+        except Exception as exc:
+            results[ticker] = (None, None, None, repr(exc))
+    return results
+
+
+class ForecastService:
+    def __init__(self, workers=None, threads_per_worker=1, csv_source=None, batch_window=0.05, batch_size=16,
+                 max_pending=64, timeout=300.0, memory_size=256):
+        from store import PriceStore, CsvProvider
+
+        self.workers = workers or os.cpu_count()
+        self.threads_per_worker = threads_per_worker
+        self.csv_source = csv_source
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.memory_size = memory_size
+
+        self.prices = PriceStore(CsvProvider(csv_source) if csv_source else None)
+        self.forecasts = ForecastStore()
+        self.as_of = {}               # ticker -> (expires, as_of)
+        self.recent = OrderedDict()   # (ticker, model, as_of) -> forecast, least recently used first
+        self.bodies = OrderedDict()   # (ticker, model, as_of, years, format) -> encoded response
+        self.pending = {}             # (ticker, model, as_of) -> future shared by every waiting request
+        self.stats = {'requests': 0, 'memory_hits': 0, 'store_hits': 0, 'coalesced': 0, 'fits': 0,
+                      'batches': 0, 'rejected': 0, 'timeouts': 0}
+        self.queue = None
+        self.pool = None
+        self.dispatcher = None
+
+    async def start(self):
+        # Same thread limits as the batch engine: N single-threaded workers use N cores
+        for name in THREAD_VARIABLES:
+            os.environ[name] = str(self.threads_per_worker)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_worker, initargs=(self.threads_per_worker, self.csv_source))
+        self.queue = asyncio.Queue()
+        self.dispatcher = asyncio.ensure_future(self.dispatch())
+
+    async def stop(self):
+        self.dispatcher.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def as_of_date(self, ticker):
+        entry = self.as_of.get(ticker)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        data = await asyncio.get_running_loop().run_in_executor(None, self.prices.load, ticker)
+        if data.empty:
+            raise LookupError(f"No price data for {ticker}")
+        as_of = as_of_date(data)
+        self.as_of[ticker] = (time.monotonic() + AS_OF_TTL, as_of)
+        return as_of
+
+    def remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.memory_size:
+            cache.popitem(last=False)
+
+    # Forecast for the longest horizon: memory, then the forecast store, then a fit in the pool.
+    # Requests arriving while the same forecast is being looked up or fitted wait for that one.
+    # Keys include the current hyperparameters, so tuning a ticker retires its cached forecasts.
+    async def get(self, ticker, model_type):
+        self.stats['requests'] += 1
+        metrics.count('cache_requests_total', cache='forecast_api')
+        as_of = await self.as_of_date(ticker)
+        settings = json.dumps(comparable(forecast_params(ticker, model_type)), sort_keys=True)
+        key = (ticker, model_type, as_of, settings)
+        if key in self.recent:
+            self.stats['memory_hits'] += 1
+            self.recent.move_to_end(key)
+            return self.recent[key], key
+
+        future = self.pending.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            metrics.count('api_coalesced_total')
+        else:
+            if len(self.pending) >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise Overloaded(f"{len(self.pending)} forecasts already pending")
+            future = asyncio.get_running_loop().create_future()
+            self.pending[key] = future
+            asyncio.ensure_future(self.resolve(key, future))
+
+        try:
+            # The shield keeps a timed-out request from cancelling the fit other requests share
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+
+    async def resolve(self, key, future):
+        ticker, model_type, as_of, settings = key
+        try:
+            forecast = await asyncio.get_running_loop().run_in_executor(
+                None, self.forecasts.get, ticker, model_type, as_of, json.loads(settings))
+            if forecast is not None:
+                self.stats['store_hits'] += 1
+            elif model_type == NEURALPROPHET_GLOBAL:
+                # Training on the whole universe is far too slow for a request
+                raise LookupError(f"No global NeuralProphet forecast for {ticker} on {as_of} yet; it is built by "
+                                  "`python app/prewarm.py --models neuralprophet_global` or "
+                                  "`python app/batch_forecast.py --models neuralprophet_global --publish`")
+            else:
+                metrics.count('cache_misses_total', cache='forecast_api')
+                batch_done = asyncio.get_running_loop().create_future()
+                await self.queue.put((ticker, model_type, batch_done))
+                forecast, as_of = await batch_done
+            self.remember(self.recent, (ticker, model_type, as_of, settings), forecast)
+            future.set_result((forecast, (ticker, model_type, as_of, settings)))
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # retrieved here, so requests that already timed out leave no warning
+        finally:
+            del self.pending[key]
+
+    # Collect the misses arriving within the batch window, group them by model and send each
+    # group to the pool in chunks spread over the workers
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size * self.workers:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            groups = {}
+            for ticker, model_type, done in batch:
+                groups.setdefault(model_type, {}).setdefault(ticker, []).append(done)
+            for model_type, waiting in groups.items():
+                tickers = list(waiting)
+                size = min(self.batch_size, -(-len(tickers) // self.workers))
+                for i in range(0, len(tickers), size):
+                    chunk = {ticker: waiting[ticker] for ticker in tickers[i:i + size]}
+                    asyncio.ensure_future(self.run_batch(chunk, model_type))
+
+    async def run_batch(self, waiting, model_type):
+        loop = asyncio.get_running_loop()
+        tickers = list(waiting)
+        self.stats['batches'] += 1
+        self.stats['fits'] += len(tickers)
+        metrics.observe('rows', len(tickers), stage='api_batch')
+        try:
+            try:
+                results = await loop.run_in_executor(self.pool, forecast_batch, tickers, model_type, MAX_YEARS * 365)
+            except Exception as exc:
+                results = {ticker: (None, None, None, repr(exc)) for ticker in tickers}
+
+            for ticker, (forecast, as_of, params, error) in results.items():
+                try:
+                    if error is not None:
+                        raise RuntimeError(error)
+                    # Publish for the Prediction page and for the next restart of this service
+                    await loop.run_in_executor(None, self.forecasts.put, ticker, model_type, as_of, forecast, params)
+                except Exception as exc:
+                    for done in waiting[ticker]:
+                        done.set_exception(exc)
+                else:
+                    for done in waiting[ticker]:
+                        done.set_result((forecast, as_of))
+        finally:
+            # Whatever went wrong, no request is left waiting and no key stays pending for good
+            for ticker in tickers:
+                for done in waiting[ticker]:
+                    if not done.done():
+                        done.set_exception(RuntimeError(f"Forecast batch for {ticker} ended without a result"))
+
+    # Encoded response for a request. Polls of an unchanged forecast reuse the bytes (or wait
+    # for the same encoding), since encoding a long history as JSON costs far more than the lookup.
+    async def body(self, ticker, model_type, years, output):
+        forecast, found = await self.get(ticker, model_type)
+        as_of = found[2]
+        key = (*found, years, output)
+        encoded = self.bodies.get(key)
+        if encoded is None:
+            encode = arrow_body if output == 'arrow' else json_body
+            encoded = asyncio.get_running_loop().run_in_executor(
+                None, encode, ticker, model_type, as_of, years, horizon(forecast, as_of, years * 365))
+            self.remember(self.bodies, key, encoded)
+        else:
+            self.bodies.move_to_end(key)
+        try:
+            return await asyncio.shield(encoded)
+        except Exception:
+            # A failed encoding is not kept, so the next request tries again
+            if self.bodies.get(key) is encoded:
+                del self.bodies[key]
+            raise
+
+    def health(self):
+        return {**self.stats, 'pending': len(self.pending), 'queued': self.queue.qsize(), 'workers': self.workers,
+                'max_pending': self.max_pending, 'in_memory': len(self.recent)}
+
+
+def json_body(ticker, model_type, as_of, years, forecast):
+    header = json.dumps({'ticker': ticker, 'model': model_type, 'as_of': as_of, 'years': years})
+    return f'{header[:-1]}, "forecast": {forecast.to_json(orient="split", index=False, date_format="iso")}}}'.encode()
+
+
+# Arrow IPC stream; the request is described in the schema metadata
+def arrow_body(ticker, model_type, as_of, years, forecast):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(forecast, preserve_index=False)
+    extra = {'ticker': ticker, 'model': model_type, 'as_of': as_of, 'years': str(years)}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **extra})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def error(status, message, **headers):
+    metrics.count('api_requests_total', status=status)
+    return web.json_response({'error': message}, status=status, headers=headers)
+
+
+async def forecast_handler(request):
+    service = request.app['service']
+    ticker = request.match_info['ticker'].upper()
+    model_type = request.query.get('model', PROPHET)
+    output = request.query.get('format', 'json')
+    try:
+        years = int(request.query.get('years', 1))
+    except ValueError:
+        return error(400, "years must be an integer")
+    if ticker not in stocks:
+        return error(404, f"Unknown ticker {ticker}")
+    if model_type not in MODELS:
+        return error(400, f"model must be one of {', '.join(MODELS)}")
+    if not 0 <= years <= MAX_YEARS:
+        return error(400, f"years must be between 0 and {MAX_YEARS}")
+    if output not in ('json', 'arrow'):
+        return error(400, "format must be json or arrow")
+    usage.record(ticker)
+
+    try:
+        body = await service.body(ticker, model_type, years, output)
+    except LookupError as exc:
+        return error(404, str(exc))
+    except Overloaded as exc:
+        return error(503, str(exc), **{'Retry-After': str(RETRY_AFTER)})
+    except asyncio.TimeoutError:
+        return error(504, f"Forecast for {ticker} not ready after {service.timeout:.0f}s; it is still being fitted")
+    except Exception as exc:
+        return error(500, str(exc))
+
+    metrics.count('api_requests_total', status=200)
+    return web.Response(body=body, content_type=ARROW_TYPE if output == 'arrow' else 'application/json')
+
+
+async def health_handler(request):
+    return web.json_response(request.app['service'].health())
+
+
+async def metrics_handler(request):
+    return web.Response(text=metrics.prometheus_text(), content_type='text/plain')
+
+
+def make_app(service):
+    app = web.Application()
+    app['service'] = service
+    app.router.add_get('/forecast/{ticker}', forecast_handler)
+    app.router.add_get('/health', health_handler)
+    app.router.add_get('/metrics', metrics_handler)
+
+    async def lifecycle(app):
+        await service.start()
+        yield
+        await service.stop()
+    app.cleanup_ctx.append(lifecycle)
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve forecasts over HTTP as JSON or Arrow")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help="Fitting processes; defaults to one per core")
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--csv-source', default=None, help="Read prices from a folder of <TICKER>_data.csv files")
+    parser.add_argument('--batch-window', type=float, default=0.05, help="Seconds to collect misses into one batch")
+    parser.add_argument('--batch-size', type=int, default=16, help="Most tickers in one batch")
+    parser.add_argument('--max-pending', type=int, default=64, help="Forecasts in progress before new ones get 503")
+    parser.add_argument('--timeout', type=float, default=300.0, help="Seconds a request waits for its forecast")
+    args = parser.parse_args()
+
+    service = ForecastService(args.workers, args.threads_per_worker, args.csv_source, args.batch_window,
+                              args.batch_size, args.max_pending, args.timeout)
+    web.run_app(make_app(service), host=args.host, port=args.port)
@@ -0,0 +1,101 @@
+import json
+import os
+import re
+import shutil
+import threading
+
+import pandas as pd
+
+from config import FORECAST_DIR
+
+# Longest horizon offered by the Prediction page; shorter horizons are a prefix of it
+MAX_YEARS = 4
+
+
+# The as-of date of a forecast is the last trading day it was trained on
+def as_of_date(data):
+    return pd.Timestamp(data['Date'].max()).strftime("%Y-%m-%d")
+
+
+# Keep the history plus the first `period` days after the as-of date
+def horizon(forecast, as_of, period):
+    cutoff = pd.Timestamp(as_of) + pd.Timedelta(days=period)
+    return forecast[forecast['ds'] <= cutoff].reset_index(drop=True)
+
+
+# Hyperparameters in the form they are stored in, so stored and current settings compare equal
+def comparable(params):
+    return json.loads(json.dumps(params, sort_keys=True, default=str))
+
+
+# Precomputed forecast frames (yhat, bounds and components for the maximum horizon),
+# stored as data/forecasts/<as_of>/<model>/<TICKER>.parquet. The hyperparameters a forecast
+# was made with and the days it covers after the as-of date are kept in the file's metadata,
+# so a forecast made before the settings were tuned, or for a shorter horizon, is a miss
+# rather than served as if it were the one asked for.
+class ForecastStore:
+    def __init__(self, folder=FORECAST_DIR):
+        self.folder = folder
+
+    def path(self, ticker, model_type, as_of):
+        return os.path.join(self.folder, as_of, model_type, f"{ticker}.parquet")
+
+    # What a stored forecast was made with ({'params': ..., 'days': ...}), read from the file's schema only
+    def info(self, ticker, model_type, as_of):
+        import pyarrow.parquet as pq
+
+        path = self.path(ticker, model_type, as_of)
+        if not os.path.exists(path):
+            return None
+        metadata = pq.read_schema(path).metadata or {}
+        return json.loads(metadata.get(b'forecast', b'{}'))
+
+    # A stored forecast counts when it covers `days` and was made with `params` (or with
+    # anything when params is None)
+    def has(self, ticker, model_type, as_of, params=None, days=MAX_YEARS * 365):
+        info = self.info(ticker, model_type, as_of)
+        return (info is not None and info.get('days', 0) >= days
+                and (params is None or info.get('params') == comparable(params)))
+
+    def get(self, ticker, model_type, as_of, params=None, days=MAX_YEARS * 365):
+        if not self.has(ticker, model_type, as_of, params, days):
+            return None
+        return pd.read_parquet(self.path(ticker, model_type, as_of))
+
+    def put(self, ticker, model_type, as_of, forecast, params=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self.path(ticker, model_type, as_of)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        table = pa.Table.from_pandas(forecast, preserve_index=False)
+        days = (pd.Timestamp(forecast['ds'].max()) - pd.Timestamp(as_of)).days
+        info = json.dumps({'params': comparable(params), 'days': days})
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'forecast': info.encode()})
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    # Remove every stored forecast of a ticker and model, e.g. after its hyperparameters changed
+    def discard(self, ticker, model_type):
+        for as_of in self.as_of_dates():
+            path = self.path(ticker, model_type, as_of)
+            if os.path.exists(path):
+                os.remove(path)
+
+    # Remove all but the newest `keep` as-of dates, and all but the newest `keep` dated output
+    # files of the batch engine, so the nightly jobs do not fill the disk
+    def prune(self, keep=5):
+        for as_of in self.as_of_dates()[:-keep]:
+            shutil.rmtree(os.path.join(self.folder, as_of), ignore_errors=True)
+        if not os.path.isdir(self.folder):
+            return
+        outputs = sorted(name for name in os.listdir(self.folder)
+                         if re.fullmatch(r'forecasts_\d{4}-\d{2}-\d{2}\.parquet', name))
+        for name in outputs[:-keep]:
+            os.remove(os.path.join(self.folder, name))
+
+    def as_of_dates(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(name for name in os.listdir(self.folder) if os.path.isdir(os.path.join(self.folder, name)))
@@ -1,5 +1,5 @@
 import streamlit as st
-from GoogleNews import GoogleNews
+from news_service import NewsService
 
 # Stock tickers (you can add more tickers to this list)
 stocks = (
@@ -12,21 +12,18 @@ stocks = (
     'CVS', 'LRCX', 'WM', 'PGR', 'EW', 'ITW', 'CME', 'NEE', 'AON', 'FISV', 'TRV'
 )
 
-# Function to get news headlines using GoogleNews
-def get_titles(search):
-    googlenews = GoogleNews(lang='en')
-    googlenews.search(search)
-    result = googlenews.result()
-
-    stories = []
-    for item in result:
-        story = {
-            'title': item['title'],
-            'link': item['link']
-        }
-        stories.append(story)
+# One news service per process, shared by every session
+@st.cache_resource
+def get_news_service():
+    return NewsService()
 
-    return stories
+# Function to get news headlines from Google News; None when the fetch failed
+def get_titles(search):
+    headlines = get_news_service().get_google_news([search])[search]
+    if isinstance(headlines, Exception):
+        st.error(f"Failed to load Google News: {headlines}")
+        return None
+    return headlines
 
 # Streamlit App Layout
 def main():
@@ -47,7 +44,7 @@ def main():
             st.success("News fetched successfully!")
             for i, headline in enumerate(headlines, 1):
                 st.markdown(f"{i}. [{headline['title']}]({headline['link']})")
-        else:
+        elif headlines is not None:
             st.warning(f"No news headlines found for {selected_stock}.")
 
 if __name__ == '__main__':
@@ -0,0 +1,153 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from config import START, RAW_DIR, CLEAN_DIR, stocks
+from store import YahooProvider, CsvProvider
+
+# Nightly ingestion job: downloads the universe in batched multi-symbol requests,
+# writes data/raw/<TICKER>_data.csv and streams data/clean/combined_stock_data.csv
+#
+#   python app/ingest.py --batch-size 20 --workers 4
+
+
+# Call the provider for one batch, retrying with exponential backoff. Yahoo answers a bulk
+# request with an empty frame for a symbol it rate-limited, so with retry_empty those tickers
+# count as failed and only they are asked for again; without it an empty frame is an answer.
+# A ticker that is empty on the first attempt while the rest of its batch came back is
+# delisted or unknown rather than rate-limited: it goes into `dead`, a set kept for the
+# whole run, and is not asked for again. Returns the frames and the attempts per ticker.
+def fetch_batch(provider, batch, start, end, retries=3, backoff=2.0, retry_empty=True, dead=None):
+    dead = set() if dead is None else dead
+    frames, attempts = {}, dict.fromkeys(batch, 0)
+    pending = [ticker for ticker in batch if ticker not in dead]
+    for attempt in range(1, retries + 2):
+        if attempt > 1:
+            time.sleep(backoff * 2 ** (attempt - 2))
+        attempts.update(dict.fromkeys(pending, attempt))
+        try:
+            fetched = provider.fetch_many(pending, start, end)
+        except Exception:
+            # Only give up on the whole batch if no ticker of it came back at all
+            if attempt > retries and not frames:
+                raise
+            continue
+        frames.update({ticker: data for ticker, data in fetched.items()
+                       if data is not None and not (retry_empty and data.empty)})
+        pending = [ticker for ticker in pending if ticker not in frames]
+        if retry_empty and attempt == 1 and frames:
+            dead.update(pending)
+            pending = []
+        if not pending:
+            break
+    return frames, attempts
+
+
+# Appends each ticker's rows to the combined table as soon as they arrive, so no
+# more than one batch is ever held in memory
+class CombinedWriter:
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.lock = threading.Lock()
+        self.header_written = False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.handle = open(self.tmp_path, 'w', newline='')
+
+    def append(self, ticker, data):
+        data = data.assign(Ticker=ticker)
+        with self.lock:
+            data.to_csv(self.handle, index=False, header=not self.header_written, date_format='%Y-%m-%d')
+            self.header_written = True
+
+    def close(self):
+        self.handle.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def run_batch(provider, batch, start, end, raw_dir, writer, retries, backoff, dead):
+    began = time.perf_counter()
+    try:
+        frames, attempts = fetch_batch(provider, batch, start, end, retries, backoff, dead=dead)
+    except Exception as exc:
+        elapsed = time.perf_counter() - began
+        return [{'ticker': ticker, 'rows': 0, 'attempts': retries + 1, 'seconds': elapsed, 'error': repr(exc)}
+                for ticker in batch]
+    fetched = time.perf_counter() - began
+
+    report = []
+    for ticker in batch:
+        data = frames.get(ticker)
+        if data is None or data.empty:
+            report.append({'ticker': ticker, 'rows': 0, 'attempts': attempts[ticker], 'seconds': fetched,
+                           'error': 'no data returned' + (', not retried' if ticker in dead else '')})
+            continue
+        write_began = time.perf_counter()
+        data.to_csv(os.path.join(raw_dir, f"{ticker}_data.csv"), index=False, date_format='%Y-%m-%d')
+        writer.append(ticker, data)
+        report.append({'ticker': ticker, 'rows': len(data), 'attempts': attempts[ticker],
+                       'seconds': fetched + time.perf_counter() - write_began, 'error': None})
+    return report
+
+
+def ingest(tickers=stocks, start=START, end=None, provider=None, raw_dir=RAW_DIR, clean_dir=CLEAN_DIR,
+           batch_size=20, workers=4, retries=3, backoff=2.0):
+    provider = provider if provider is not None else YahooProvider()
+    end = end or date.today().strftime("%Y-%m-%d")
+    tickers = list(dict.fromkeys(tickers))  # the universe lists MDT twice
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+    os.makedirs(raw_dir, exist_ok=True)
+    writer = CombinedWriter(os.path.join(clean_dir, 'combined_stock_data.csv'))
+    report = []
+    dead = set()  # tickers found empty while their batch was not, never retried in this run
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_batch, provider, batch, start, end, raw_dir, writer, retries, backoff, dead)
+                       for batch in batches]
+            for future in as_completed(futures):
+                report.extend(future.result())
+    finally:
+        writer.close()
+    return sorted(report, key=lambda row: row['ticker'])
+
+
+def print_report(report, elapsed):
+    for row in report:
+        status = 'ok' if row['error'] is None else f"FAILED ({row['error']})"
+        print(f"{row['ticker']:<6} {row['rows']:>6} rows  {row['seconds']:6.2f}s  "
+              f"{row['attempts']} attempt(s)  {status}")
+    failed = [row['ticker'] for row in report if row['error'] is not None]
+    print(f"\n{len(report) - len(failed)}/{len(report)} tickers ingested in {elapsed:.1f}s")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Download the stock universe into data/raw and data/clean")
+    parser.add_argument('--tickers', nargs='*', default=list(stocks))
+    parser.add_argument('--start', default=START)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=2.0)
+    parser.add_argument('--csv-source', default=None, help="Read from a folder of <TICKER>_data.csv files instead of Yahoo")
+    parser.add_argument('--raw-dir', default=RAW_DIR)
+    parser.add_argument('--clean-dir', default=CLEAN_DIR)
+    parser.add_argument('--matrix', action='store_true', help="Rebuild the shared price matrix from the combined table")
+    args = parser.parse_args()
+
+    provider = CsvProvider(args.csv_source) if args.csv_source else YahooProvider()
+    began = time.perf_counter()
+    report = ingest(args.tickers, args.start, args.end, provider, args.raw_dir, args.clean_dir,
+                    args.batch_size, args.workers, args.retries, args.backoff)
+    print_report(report, time.perf_counter() - began)
+    if args.matrix:
+        from shared_prices import build_from_csv
+        print(f"Price matrix written to {build_from_csv(os.path.join(args.clean_dir, 'combined_stock_data.csv'))}")
+    if any(row['error'] is not None for row in report):
+        raise SystemExit(1)
@@ -0,0 +1,281 @@
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import INTRADAY_DIR, stocks
+from store import yahoo_symbol
+
+# Intraday mode: minute quotes from a pluggable source are folded into 1m/5m/1h/1d OHLCV
+# bars as they arrive. Every ticker keeps one fixed-size ring buffer per bar size, so memory
+# is bounded and a quote costs a constant amount of work; frames are only built when a
+# page reads them.
+#
+#   python app/intraday.py --record AAPL MSFT         # save today's Yahoo minute bars for replay
+#   python app/intraday.py --synthetic --days 5       # or generate a replay file offline
+
+# Bar sizes in seconds and how many bars of each are kept per ticker
+BAR_SECONDS = {'1m': 60, '5m': 300, '1h': 3600, '1d': 86400}
+CAPACITY = {
+    '1m': 390 * 5,   # five sessions of minute bars
+    '5m': 78 * 20,   # a month of five-minute bars
+    '1h': 7 * 60,    # about three months of hourly bars
+    '1d': 252 * 2,   # two years of daily bars
+}
+
+REPLAY_PATH = os.path.join(INTRADAY_DIR, 'replay.csv')
+QUOTE_COLUMNS = ['Datetime', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']
+MARKET_TZ = 'America/New_York'
+
+
+# OHLCV bars of one size in a circular buffer: a quote either updates the newest bar or
+# starts a new one, overwriting the oldest when the buffer is full
+class BarBuffer:
+    def __init__(self, seconds, capacity):
+        self.step = seconds * 1_000_000_000
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((5, capacity), dtype=np.float64)   # open, high, low, close, volume
+        self.end = 0      # slot after the newest bar
+        self.size = 0
+        self.dropped = 0  # quotes older than the newest bar
+
+    def add(self, timestamp, open_, high, low, close, volume):
+        start = timestamp - timestamp % self.step
+        newest = (self.end - 1) % self.capacity
+        if self.size and start == self.times[newest]:
+            bar = self.values[:, newest]
+            bar[1] = max(bar[1], high)
+            bar[2] = min(bar[2], low)
+            bar[3] = close
+            bar[4] += volume
+            return
+        if self.size and start < self.times[newest]:
+            self.dropped += 1
+            return
+        self.times[self.end] = start
+        self.values[:, self.end] = (open_, high, low, close, volume)
+        self.end = (self.end + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def closes(self):
+        order = (np.arange(self.size) + self.end - self.size) % self.capacity
+        return pd.Series(self.values[3, order], index=self.times[order].astype('datetime64[ns]'))
+
+    def last_close(self):
+        return self.values[3, (self.end - 1) % self.capacity] if self.size else np.nan
+
+    # Bars oldest first, in the Date/Open/High/Low/Close/Adj Close/Volume layout of the daily data
+    def frame(self):
+        order = (np.arange(self.size) + self.end - self.size) % self.capacity
+        values = self.values[:, order]
+        return pd.DataFrame({
+            'Date': self.times[order].astype('datetime64[ns]'),
+            'Open': values[0], 'High': values[1], 'Low': values[2], 'Close': values[3],
+            'Adj Close': values[3], 'Volume': values[4],
+        })
+
+
+# Ring buffers for every ticker and bar size, updated by the feed thread and read by the pages
+class IntradayBook:
+    def __init__(self, tickers=stocks, bar_seconds=BAR_SECONDS, capacity=CAPACITY):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.buffers = {ticker: {name: BarBuffer(seconds, capacity[name]) for name, seconds in bar_seconds.items()}
+                        for ticker in self.tickers}
+        self.lock = threading.Lock()
+        self.quotes = 0
+        self.updated = 0.0
+
+    def add(self, ticker, timestamp, open_, high, low, close, volume):
+        buffers = self.buffers.get(ticker)
+        if buffers is None:
+            return
+        with self.lock:
+            for buffer in buffers.values():
+                buffer.add(timestamp, open_, high, low, close, volume)
+            self.quotes += 1
+            self.updated = time.time()
+
+    def add_many(self, quotes):
+        for quote in quotes:
+            self.add(*quote)
+
+    def frame(self, ticker, bar='1m'):
+        with self.lock:
+            return self.buffers[ticker][bar].frame()
+
+    # Closes of several tickers on a shared time axis, for the Dashboard returns
+    def closes(self, tickers, bar='5m'):
+        with self.lock:
+            series = {ticker: self.buffers[ticker][bar].closes() for ticker in tickers if ticker in self.buffers}
+        return pd.DataFrame(series).sort_index()
+
+    def last_prices(self, tickers):
+        with self.lock:
+            return {ticker: self.buffers[ticker]['1m'].last_close() for ticker in tickers if ticker in self.buffers}
+
+
+# Replays minute quotes saved in a CSV (Datetime, Ticker, Open, High, Low, Close, Volume),
+# releasing them at `speed` times real time; the offline stand-in for a live feed.
+# Nights and weekends are skipped rather than replayed. When looping, each pass is moved
+# forward by the file's span in whole weeks, so the buffers keep receiving newer bars on
+# the same weekdays instead of dropping the repeated ones.
+class ReplaySource:
+    MAX_GAP = 5 * 60 * 1_000_000_000
+    WEEK = 7 * 86400 * 1_000_000_000
+
+    def __init__(self, path=REPLAY_PATH, speed=60.0, loop=True):
+        quotes = pd.read_csv(path, parse_dates=['Datetime']).sort_values('Datetime', kind='stable')
+        self.times = quotes['Datetime'].values.astype('datetime64[ns]').astype(np.int64)
+        self.rows = list(zip(quotes['Ticker'], self.times.tolist(), *(quotes[col].to_numpy(np.float64).tolist()
+                                                                      for col in QUOTE_COLUMNS[2:])))
+        self.speed = speed
+        self.loop = loop
+        self.position = 0
+        self.clock = self.times[0] if len(self.times) else 0
+        self.last_poll = time.monotonic()
+        self.span = (int(self.times[-1] - self.times[0]) // self.WEEK + 1) * self.WEEK if len(self.times) else 0
+        self.offset = 0   # added to the file's timestamps on the current pass
+
+    def poll(self):
+        if self.position >= len(self.rows):
+            if not self.loop or not self.rows:
+                return []
+            self.position = 0
+            self.clock = self.times[0]
+            self.offset += self.span
+        now = time.monotonic()
+        self.clock += int((now - self.last_poll) * self.speed * 1_000_000_000)
+        self.last_poll = now
+        if self.times[self.position] - self.clock > self.MAX_GAP:
+            self.clock = self.times[self.position]
+        due = int(np.searchsorted(self.times, self.clock, side='right'))
+        quotes = self.rows[self.position:due]
+        self.position = max(due, self.position)
+        if self.offset:
+            quotes = [(ticker, timestamp + self.offset, *bar) for ticker, timestamp, *bar in quotes]
+        return quotes
+
+
+# Today's Yahoo minute bars, returning each completed minute once
+class YahooIntradaySource:
+    def __init__(self, tickers=stocks):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.last_seen = {}
+
+    def download(self):
+        import yfinance as yf
+
+        symbols = [yahoo_symbol(ticker) for ticker in self.tickers]
+        data = yf.download(symbols, period='1d', interval='1m', progress=False, auto_adjust=False,
+                           group_by='ticker', threads=True)
+        frames = {}
+        for ticker, symbol in zip(self.tickers, symbols):
+            if isinstance(data.columns, pd.MultiIndex) and symbol in data.columns.get_level_values(0):
+                bars = data[symbol].dropna(how='all')
+                if bars.index.tz is not None:
+                    bars.index = bars.index.tz_convert(MARKET_TZ).tz_localize(None)
+                frames[ticker] = bars
+        return frames
+
+    def poll(self):
+        quotes = []
+        for ticker, bars in self.download().items():
+            if bars.empty:
+                continue
+            times = bars.index.values.astype('datetime64[ns]').astype(np.int64)
+            # The newest minute is still forming, so it is only taken on a later poll
+            fresh = (times > self.last_seen.get(ticker, 0)) & (times < times[-1])
+            for timestamp, row in zip(times[fresh], bars[fresh].itertuples(index=False)):
+                quotes.append((ticker, int(timestamp), row.Open, row.High, row.Low, row.Close, row.Volume))
+            if fresh.any():
+                self.last_seen[ticker] = int(times[fresh][-1])
+        return quotes
+
+
+# Background thread moving quotes from a source into a book
+class IntradayFeed:
+    def __init__(self, source, book, interval=1.0):
+        self.source = source
+        self.book = book
+        self.interval = interval
+        self.error = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.book.add_many(self.source.poll())
+                self.error = None
+            except Exception as exc:
+                self.error = repr(exc)  # shown by the pages; the next poll tries again
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+
+
+# Source named by STOCK_APP_INTRADAY_SOURCE: 'replay' (default, data/intraday/replay.csv) or 'yahoo'
+def make_source(name=None, tickers=stocks):
+    name = name or os.environ.get('STOCK_APP_INTRADAY_SOURCE', 'replay')
+    if name == 'yahoo':
+        return YahooIntradaySource(tickers), 30.0
+    return ReplaySource(os.environ.get('STOCK_APP_INTRADAY_REPLAY', REPLAY_PATH)), 1.0
+
+
+def record(tickers, path=REPLAY_PATH):
+    rows = YahooIntradaySource(tickers).poll()
+    quotes = pd.DataFrame(rows, columns=['Ticker', 'Datetime', *QUOTE_COLUMNS[2:]])
+    quotes['Datetime'] = pd.to_datetime(quotes['Datetime'])
+    return write_quotes(quotes, path)
+
+
+# Random-walk minute bars over regular sessions, for demos without network access
+def synthetic(tickers, days=5, path=REPLAY_PATH, seed=0):
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    minutes = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=390, freq='min').values for day in sessions]))
+    frames = []
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, len(minutes))))
+        opening = np.concatenate([[close[0]], close[:-1]])
+        wiggle = np.abs(rng.normal(0, 0.0005, len(minutes)))
+        frames.append(pd.DataFrame({
+            'Datetime': minutes, 'Ticker': ticker, 'Open': opening,
+            'High': np.maximum(opening, close) * (1 + wiggle), 'Low': np.minimum(opening, close) * (1 - wiggle),
+            'Close': close, 'Volume': rng.integers(100, 10_000, len(minutes)),
+        }))
+    return write_quotes(pd.concat(frames, ignore_index=True), path)
+
+
+def write_quotes(quotes, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    quotes.sort_values(['Datetime', 'Ticker'])[QUOTE_COLUMNS].to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create a replay file of minute quotes for the intraday mode")
+    parser.add_argument('--tickers', nargs='*', default=list(stocks))
+    parser.add_argument('--record', nargs='*', default=None, help="Record today's Yahoo minute bars (optionally for these tickers)")
+    parser.add_argument('--synthetic', action='store_true', help="Generate random-walk minute bars instead")
+    parser.add_argument('--days', type=int, default=5, help="Sessions of synthetic data")
+    parser.add_argument('--output', default=REPLAY_PATH)
+    args = parser.parse_args()
+
+    tickers = list(dict.fromkeys(args.record or args.tickers))
+    if args.synthetic:
+        path = synthetic(tickers, args.days, args.output)
+    elif args.record is not None:
+        path = record(tickers, args.output)
+    else:
+        parser.error("choose --record or --synthetic")
+    print(f"Replay file written to {path}")
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Lightweight instrumentation for the Streamlit pages: timed spans around each stage of a
+# render, cache hit/miss counters and data sizes, exported in the Prometheus text format.
+# Switched on with STOCK_APP_METRICS=1; when off, every call returns before doing any work.
+#
+#   STOCK_APP_METRICS=1 streamlit run app/main.py
+#   curl localhost:9464/metrics
+
+ENABLED = os.environ.get('STOCK_APP_METRICS', '') not in ('', '0', 'false')
+PORT = int(os.environ.get('STOCK_APP_METRICS_PORT', 9464))
+PREFIX = 'stock_app'
+
+# Upper bounds, in seconds, of the stage duration histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    'stage_seconds': ('histogram', "Time spent in each stage of a page render"),
+    'cache_requests_total': ('counter', "Lookups of a cache"),
+    'cache_misses_total': ('counter', "Lookups of a cache that had to compute or fetch the value"),
+    'rows': ('summary', "Rows or items produced by a stage"),
+    'model_registry': ('gauge', "Model registry statistics"),
+    'api_requests_total': ('counter', "Forecast API responses by status"),
+    'api_coalesced_total': ('counter', "Forecast API requests that joined a fit already in progress"),
+}
+
+lock = threading.Lock()
+counters = {}
+histograms = {}
+summaries = {}
+gauges = {}
+
+# Spans of the render in progress on this thread (Streamlit runs each session's script in
+# its own thread), kept for the debug sidebar
+local = threading.local()
+DISABLED = nullcontext()
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def count(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = (name, label_key(labels))
+    with lock:
+        counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    key = (name, label_key(labels))
+    with lock:
+        total, n = summaries.get(key, (0.0, 0))
+        summaries[key] = (total + value, n + 1)
+
+
+def set_gauges(name, values, **labels):
+    if not ENABLED:
+        return
+    with lock:
+        for field, value in values.items():
+            gauges[(name, label_key({**labels, 'field': field}))] = value
+
+
+def record_stage(stage, seconds):
+    labels = {'page': getattr(local, 'page', ''), 'stage': stage}
+    key = ('stage_seconds', label_key(labels))
+    with lock:
+        buckets, total, n = histograms.get(key, ([0] * len(BUCKETS), 0.0, 0))
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+        histograms[key] = (buckets, total + seconds, n + 1)
+    spans = getattr(local, 'spans', None)
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage):
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - began)
+
+
+# Time one stage of the current render
+def span(stage):
+    return timed(stage) if ENABLED else DISABLED
+
+
+# Wrap a whole page render: nested spans are labelled with the page and collected
+@contextmanager
+def page_render(page):
+    if not ENABLED:
+        yield []
+        return
+    local.page = page
+    local.spans = []
+    try:
+        with timed('render'):
+            yield local.spans
+    finally:
+        local.page = ''
+
+
+def format_labels(labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}' if labels else ''
+
+
+# All metrics in the Prometheus text exposition format
+def prometheus_text():
+    with lock:
+        snapshot = {
+            'counter': dict(counters), 'histogram': dict(histograms),
+            'summary': dict(summaries), 'gauge': dict(gauges),
+        }
+    lines = []
+    for name, (kind, description) in HELP.items():
+        series = sorted((key, value) for key, value in snapshot[kind].items() if key[0] == name)
+        if not series:
+            continue
+        metric = f"{PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for (_, labels), value in series:
+            if kind == 'histogram':
+                buckets, total, n = value
+                for bound, hits in zip(BUCKETS, buckets):
+                    lines.append(f"{metric}_bucket{format_labels(labels + (('le', bound),))} {hits}")
+                lines.append(f"{metric}_bucket{format_labels(labels + (('le', '+Inf'),))} {n}")
+                lines.append(f"{metric}_sum{format_labels(labels)} {total}")
+                lines.append(f"{metric}_count{format_labels(labels)} {n}")
+            elif kind == 'summary':
+                total, n = value
+                lines.append(f"{metric}_sum{format_labels(labels)} {total}")
+                lines.append(f"{metric}_count{format_labels(labels)} {n}")
+            else:
+                lines.append(f"{metric}{format_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the Streamlit log
+
+
+# Serve /metrics on a daemon thread; returns None when the port is taken by another process
+def start_server(port=PORT, host='0.0.0.0'):
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError:
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,146 @@
+import pandas as pd
+
+# Forecasting models used by the Prediction page, kept in one place so the app,
+# the registry and the offline jobs all fit exactly the same configurations
+
+PROPHET = 'prophet'
+NEURALPROPHET = 'neuralprophet'
+# One NeuralProphet trained on the stacked series of every ticker, told apart by an ID column
+NEURALPROPHET_GLOBAL = 'neuralprophet_global'
+NEURAL_MODELS = (NEURALPROPHET, NEURALPROPHET_GLOBAL)
+
+DEFAULT_PARAMS = {
+    PROPHET: {},
+    NEURALPROPHET: {
+        'yearly_seasonality': 10,   # Control how much yearly seasonality to use
+        'weekly_seasonality': False  # Disable weekly seasonality if it's causing noise
+    },
+    NEURALPROPHET_GLOBAL: {
+        'yearly_seasonality': 10,
+        'weekly_seasonality': False,
+        'trend_global_local': 'local',    # each stock keeps its own trend...
+        'season_global_local': 'global',  # ...while the yearly pattern is learnt from all of them
+    },
+}
+
+# Warm-start settings: how much new data an update may absorb before falling back to a full refit
+WARM_START = {
+    'max_new_rows': 30,          # more trading days than this since the last fit means refit
+    'max_drift_mape': 0.05,      # error of the old model on the new days that triggers a refit
+    'neuralprophet_epochs': 5,   # extra epochs when continuing NeuralProphet training
+}
+
+
+# Rename the loaded prices to the ds/y columns both libraries expect
+def make_train_frame(data):
+    df_train = data[['Date', 'Close']]
+    df_train = df_train.rename(columns={"Date": "ds", "Close": "y"})
+    return df_train
+
+
+# Stack the ds/y frames of several tickers into the long format of the global model
+def make_panel_frame(frames):
+    return pd.concat([make_train_frame(data).assign(ID=ticker) for ticker, data in frames.items()],
+                     ignore_index=True)
+
+
+def model_params(model_type, params=None):
+    return dict(DEFAULT_PARAMS[model_type] if params is None else params)
+
+
+def build_model(model_type, params=None):
+    params = model_params(model_type, params)
+    if model_type == PROPHET:
+        from prophet import Prophet
+        return Prophet(**params)
+    if model_type in NEURAL_MODELS:
+        from neuralprophet import NeuralProphet
+        return NeuralProphet(**params)
+    raise ValueError(f"Unknown model type: {model_type}")
+
+
+def fit_model(model_type, df_train, params=None):
+    m = build_model(model_type, params)
+    if model_type in NEURAL_MODELS:
+        m.fit(df_train, freq="D")  # Daily frequency
+    else:
+        m.fit(df_train)
+    return m
+
+
+# Apply a forecast horizon (in days) to an already fitted model
+def make_forecast(m, model_type, df_train, period):
+    if model_type in NEURAL_MODELS:
+        future = m.make_future_dataframe(df=df_train, n_historic_predictions=True, periods=period)
+    else:
+        future = m.make_future_dataframe(periods=period)
+    return m.predict(future)
+
+
+# Start Prophet's Stan optimisation from the parameters of a previous fit
+def prophet_init(m):
+    init = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        init[name] = m.params[name][0][0]
+    for name in ['delta', 'beta']:
+        init[name] = m.params[name][0]
+    return init
+
+
+# Predictions of a fitted model for the dates of a ds/y frame
+def predict_dates(m, model_type, df):
+    if model_type in NEURAL_MODELS:
+        return m.predict(df).rename(columns=NEURALPROPHET_COLUMNS)
+    return m.predict(df[['ds']])
+
+
+# Mean absolute percentage error of a fitted model on rows it was not trained on
+def drift(m, model_type, new_rows):
+    predicted = predict_dates(m, model_type, new_rows)['yhat'].values
+    actual = new_rows['y'].values
+    return float(abs((actual - predicted) / actual).mean())
+
+
+# Bring a model fitted on the first prev_rows rows of df_train up to date, warm-starting
+# from its parameters unless too much new data arrived or the old model has drifted
+def update_model(model_type, m_prev, df_train, prev_rows, params=None, settings=None):
+    settings = {**WARM_START, **(settings or {})}
+    new_rows = df_train.iloc[prev_rows:]
+    if new_rows.empty:
+        return m_prev, 'unchanged'
+    if len(new_rows) > settings['max_new_rows'] or drift(m_prev, model_type, new_rows) > settings['max_drift_mape']:
+        return fit_model(model_type, df_train, params), 'full'
+
+    if model_type in NEURAL_MODELS:
+        m_prev.fit(df_train, freq="D", epochs=settings['neuralprophet_epochs'], continue_training=True)
+        return m_prev, 'warm'
+    # A Prophet object can only be fit once, so warm-start a fresh one from the old parameters
+    m = build_model(model_type, params)
+    m.fit(df_train, init=prophet_init(m_prev))
+    return m, 'warm'
+
+
+# Columns shared by both libraries' forecasts, so frames from either model can be stored together
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper', 'trend', 'yearly', 'weekly']
+NEURALPROPHET_COLUMNS = {'yhat1': 'yhat', 'season_yearly': 'yearly', 'season_weekly': 'weekly'}
+
+
+def standard_forecast(forecast, model_type):
+    if model_type in NEURAL_MODELS:
+        forecast = forecast.rename(columns=NEURALPROPHET_COLUMNS)
+    forecast = forecast.copy()
+    for col in FORECAST_COLUMNS:
+        if col not in forecast.columns:
+            forecast[col] = float('nan')
+    return forecast[FORECAST_COLUMNS]
+
+
+# Forecasts of the global model for a batch of tickers, one future frame and one predict call
+# for the whole batch, split back into a standard forecast frame per ticker
+def make_panel_forecast(m, df_panel, tickers, period):
+    batch = df_panel[df_panel['ID'].isin(tickers)]
+    forecast = make_forecast(m, NEURALPROPHET_GLOBAL, batch, period)
+    if 'ID' not in forecast.columns:
+        forecast = forecast.assign(ID=tickers[0])  # a single series comes back without its ID
+    return {ticker: standard_forecast(frame, NEURALPROPHET_GLOBAL)
+            for ticker, frame in forecast.groupby('ID', sort=False)}
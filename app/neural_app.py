@@ -4,9 +4,9 @@ import yfinance as yf
 import plotly as pt
 import streamlit as st
 from datetime import date
-from prophet import Prophet
-from neuralprophet import NeuralProphet
 from plotly import graph_objs as go
+from models import NEURALPROPHET, make_train_frame, make_forecast
+from registry import ModelRegistry
 
 START = "2010-01-01"
 TODAY = date.today().strftime("%Y-%m-%d")
@@ -50,14 +50,15 @@ def plot_raw_data():
 plot_raw_data()
 
 # Forecasting with NeuralProphet
-df_train = data[['Date', 'Close']]
-df_train = df_train.rename(columns={"Date": "ds", "Close": "y"})
+df_train = make_train_frame(data)
 
-m = NeuralProphet()
-m.fit(df_train, freq="D")
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry()
 
-future = m.make_future_dataframe(df=df_train, n_historic_predictions=True, periods=period)
-forecast = m.predict(future)
+# This page uses NeuralProphet's library defaults, hence the empty params
+m = get_model_registry().get_or_fit(selected_stocks, NEURALPROPHET, df_train, params={})
+forecast = make_forecast(m, NEURALPROPHET, df_train, period)
 
 st.subheader("Forecast data")
 st.write(forecast.tail())
@@ -1,6 +1,5 @@
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
+from news_service import NewsService
 import pandas as pd
 
 # Stock tickers (you can add more tickers to this list)
@@ -14,53 +13,28 @@ stocks = (
     'CVS', 'LRCX', 'WM', 'PGR', 'EW', 'ITW', 'CME', 'NEE', 'AON', 'FISV', 'TRV'
 )
 
-# Function to get the Yahoo Finance page and return the parsed HTML document
-def get_page(url):
-    response = requests.get(url)
-    if not response.ok:
-        st.error(f"Failed to load page {url}. Status code: {response.status_code}")
-        return None
-    page_content = response.text
-    doc = BeautifulSoup(page_content, 'html.parser')
-    return doc
+# One news service per process: the Yahoo page is fetched and parsed once per TTL
+@st.cache_resource
+def get_news_service():
+    return NewsService()
 
-# Function to scrape general news and filter it based on stock ticker
+# Function to get the general Yahoo Finance news filtered on a stock ticker
 def scrape_news(stock):
-    # General Yahoo Finance news page
-    my_url = "https://finance.yahoo.com/topic/stock-market-news/"
-    doc = get_page(my_url)
-    
-    if doc is None:
+    try:
+        stories = get_news_service().get_yahoo_news_by_ticker([stock])[stock]
+    except Exception as exc:
+        st.error(f"Failed to load Yahoo Finance news: {exc}")
         return []
+    return [f"{story['title']} - [Link]({story['link']})" for story in stories]
 
-    # Find the relevant tags containing news headlines
-    a_tags = doc.find_all('a', {'class': "js-content-viewer"})
-
-    news_list = []
-    for tag in a_tags:
-        headline = tag.text.strip()  # Strip any extra spaces
-        # Check if the stock ticker is mentioned in the headline
-        if stock in headline:
-            link = "https://finance.yahoo.com" + tag['href']
-            news_list.append(f"{headline} - [Link]({link})")
-    
-    return news_list
-
-# New function to scrape headlines from Yahoo Finance's stock market news page
+# Function to get all headlines from Yahoo Finance's stock market news page
 def get_headlines():
-    my_url = 'https://finance.yahoo.com/topic/stock-market-news/'
-    doc = get_page(my_url)
-
-    if doc is None:
+    try:
+        stories = get_news_service().get_yahoo_news()
+    except Exception as exc:
+        st.error(f"Failed to load Yahoo Finance news: {exc}")
         return pd.DataFrame()  # Return an empty DataFrame in case of failure
-
-    news_list = []
-    for e in doc.select('div:has(>h3>a)'):
-        news = e.h3.text
-        news_list.append(news)
-
-    news_df = pd.DataFrame(news_list, columns=["Headline"])
-    return news_df
+    return pd.DataFrame([story['title'] for story in stories], columns=["Headline"])
 
 # Streamlit App Layout
 def main():
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import quote_plus
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+import metrics
+from ticker_index import TickerIndex
+
+# Asynchronous news fetching shared by the news pages: one pooled HTTP session on a
+# background event loop, concurrent multi-ticker requests and a TTL cache per source.
+# Base URLs can point at a local HTTP server for offline runs and tests.
+
+GOOGLE_NEWS_URL = "https://news.google.com"
+YAHOO_URL = "https://finance.yahoo.com"
+YAHOO_NEWS_PATH = "/topic/stock-market-news/"
+
+# Seconds a fetched result stays fresh, per source
+TTL = {'google': 300, 'yahoo': 120}
+
+
+# Time-based cache that also coalesces concurrent misses for the same key into one fetch
+class TTLCache:
+    def __init__(self, ttl, name='news'):
+        self.ttl = ttl
+        self.name = name
+        self.entries = {}
+        self.pending = {}
+
+    async def get(self, key, fetch):
+        metrics.count('cache_requests_total', cache=self.name)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        if key in self.pending:
+            return await self.pending[key]
+        metrics.count('cache_misses_total', cache=self.name)
+        task = asyncio.ensure_future(fetch())
+        self.pending[key] = task
+        try:
+            value = await task
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+        finally:
+            del self.pending[key]
+
+
+# Drop repeated headlines, comparing titles without case or surrounding whitespace
+def dedupe(stories):
+    seen = set()
+    unique = []
+    for story in stories:
+        key = ' '.join(story['title'].lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(story)
+    return unique
+
+
+def parse_google_rss(text):
+    root = ET.fromstring(text)
+    return [{'title': (item.findtext('title') or '').strip(), 'link': (item.findtext('link') or '').strip()}
+            for item in root.iter('item')]
+
+
+# Headlines of the Yahoo Finance market news page, covering both layouts the old
+# scrapers read (js-content-viewer links and h3 headings)
+def parse_yahoo_page(text, base_url=YAHOO_URL):
+    doc = BeautifulSoup(text, 'html.parser')
+    stories = []
+    for tag in doc.find_all('a', {'class': "js-content-viewer"}):
+        stories.append({'title': tag.text.strip(), 'link': base_url + tag.get('href', '')})
+    for heading in doc.select('div > h3'):
+        anchor = heading.find('a', recursive=False)
+        if anchor is None:
+            continue
+        link = anchor.get('href', '')
+        stories.append({'title': heading.text.strip(), 'link': link if link.startswith('http') else base_url + link})
+    return dedupe(stories)
+
+
+class NewsService:
+    def __init__(self, google_url=GOOGLE_NEWS_URL, yahoo_url=YAHOO_URL, max_connections=20, timeout=10):
+        self.google_url = google_url.rstrip('/')
+        self.yahoo_url = yahoo_url.rstrip('/')
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.google_cache = TTLCache(TTL['google'], 'google_news')
+        self.yahoo_cache = TTLCache(TTL['yahoo'], 'yahoo_news')
+        self.ticker_index = TickerIndex()
+        self.session = None
+
+        # Streamlit runs scripts in worker threads without an event loop, so the service
+        # owns one on a daemon thread and the sync helpers below submit work to it
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def get_session(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': 'Mozilla/5.0'},
+            )
+        return self.session
+
+    async def fetch_text(self, url):
+        session = await self.get_session()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return await response.text()
+
+    async def google_news(self, ticker):
+        url = f"{self.google_url}/rss/search?q={quote_plus(ticker + ' stock')}&hl=en-US&gl=US&ceid=US:en"
+
+        async def fetch():
+            return dedupe(parse_google_rss(await self.fetch_text(url)))
+        return await self.google_cache.get(ticker, fetch)
+
+    # Google News for several tickers at once; a failed ticker maps to its exception so the
+    # page can tell a fetch error from a ticker without headlines
+    async def google_news_many(self, tickers):
+        results = await asyncio.gather(*(self.google_news(ticker) for ticker in tickers), return_exceptions=True)
+        return dict(zip(tickers, results))
+
+    # The Yahoo page is downloaded, parsed and indexed by ticker once per TTL,
+    # whatever the number of tickers asked for
+    async def yahoo_page(self):
+        async def fetch():
+            stories = parse_yahoo_page(await self.fetch_text(self.yahoo_url + YAHOO_NEWS_PATH), self.yahoo_url)
+            return stories, self.ticker_index.index(stories)
+        return await self.yahoo_cache.get('market', fetch)
+
+    async def yahoo_news(self):
+        stories, _ = await self.yahoo_page()
+        return stories
+
+    async def yahoo_news_by_ticker(self, tickers):
+        _, index = await self.yahoo_page()
+        return {ticker: index.get(ticker, []) for ticker in tickers}
+
+    # Blocking helpers for the Streamlit pages
+    def get_google_news(self, tickers):
+        return self.run(self.google_news_many(list(tickers)))
+
+    def get_yahoo_news(self):
+        return self.run(self.yahoo_news())
+
+    def get_yahoo_news_by_ticker(self, tickers):
+        return self.run(self.yahoo_news_by_ticker(list(tickers)))
+
+    def close(self):
+        if self.session is not None:
+            self.run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
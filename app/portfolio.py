@@ -0,0 +1,186 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from analytics import TRADING_DAYS
+
+# Portfolio analytics for the Portfolio page, all batched NumPy. The efficient frontier is the
+# upper envelope of tens of thousands of random long-only portfolios, scored in matrix products
+# a chunk at a time. Forward paths are simulated either with geometric Brownian motion
+# (correlated normal log returns) or a block bootstrap of historical days, in chunks of paths
+# sized to a memory budget; each chunk has its own seed derived from the run's seed, so results
+# are reproducible whatever the number of threads.
+
+# Bytes of simulated asset returns held by one chunk, and chunks simulated at once
+CHUNK_BYTES = 32 * 1024 ** 2
+THREADS = min(os.cpu_count() or 1, 8)
+# Most time steps simulated per path; longer horizons are simulated on a coarser grid
+MAX_STEPS = 250
+
+# Percentiles of the simulated portfolio value shown as bands
+QUANTILES = (5, 25, 50, 75, 95)
+
+
+# Daily returns in [start, end] on the days every ticker traded, as a days x tickers matrix
+def common_returns(panel, start=None, end=None, log=False):
+    lo, hi = panel.bounds(start, end)
+    first = min(lo + 1, hi)
+    traded = panel.valid[:, first:hi].all(axis=0)
+    returns = (panel.logs if log else panel.simple)[:, first:hi]
+    return np.ascontiguousarray(returns[:, traded].T)
+
+
+# Annualised mean vector and covariance matrix of daily returns
+def annual_moments(returns):
+    returns = returns.astype(np.float64)
+    mean = returns.mean(axis=0) * TRADING_DAYS
+    cov = np.atleast_2d(np.cov(returns, rowvar=False)) * TRADING_DAYS
+    return mean, cov
+
+
+# Long-only weights summing to one. Each row draws its own Dirichlet concentration, so the
+# sample covers concentrated corner portfolios as well as diversified ones.
+def random_weights(rng, n, k):
+    alpha = np.exp(rng.uniform(np.log(0.05), 0.0, n))
+    weights = rng.gamma(alpha[:, None], size=(n, k)) + 1e-12
+    weights /= weights.sum(axis=1, keepdims=True)
+    return weights
+
+
+# Expected return, volatility and Sharpe ratio of n random portfolios, with the weights of the
+# best Sharpe ratio and the lowest volatility; only one chunk of weights exists at a time
+def random_portfolios(mean, cov, n=50_000, risk_free=0.0, seed=0, chunk=10_000):
+    rng = np.random.default_rng(seed)
+    k = len(mean)
+    returns = np.empty(n)
+    volatility = np.empty(n)
+    best = {'max_sharpe': (-np.inf, None), 'min_volatility': (np.inf, None)}
+    for lo in range(0, n, chunk):
+        weights = random_weights(rng, min(chunk, n - lo), k)
+        r = weights @ mean
+        v = np.sqrt(np.maximum(((weights @ cov) * weights).sum(axis=1), 0))
+        returns[lo:lo + len(r)] = r
+        volatility[lo:lo + len(v)] = v
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = (r - risk_free) / v
+        i, j = np.nanargmax(sharpe), np.argmin(v)
+        if sharpe[i] > best['max_sharpe'][0]:
+            best['max_sharpe'] = (sharpe[i], weights[i].copy())
+        if v[j] < best['min_volatility'][0]:
+            best['min_volatility'] = (v[j], weights[j].copy())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (returns - risk_free) / volatility
+    return {'returns': returns, 'volatility': volatility, 'sharpe': sharpe,
+            'max_sharpe': best['max_sharpe'][1], 'min_volatility': best['min_volatility'][1]}
+
+
+# Efficient frontier of the sampled portfolios: walking up in volatility, the points that
+# beat every return seen so far
+def frontier(returns, volatility):
+    order = np.argsort(volatility, kind='stable')
+    r = returns[order]
+    best_before = np.concatenate([[-np.inf], np.maximum.accumulate(r)[:-1]])
+    edge = order[r > best_before]
+    return volatility[edge], returns[edge]
+
+
+# Paths per chunk so that a chunk's days x tickers returns fit in the memory budget
+def chunk_size(days, k, budget=CHUNK_BYTES):
+    return max(1, budget // (days * k * 4))
+
+
+# Simulated days: every day up to max_steps, otherwise about max_steps evenly spaced days
+# ending on the last one, which is plenty for a fan chart and a final distribution
+def time_grid(days, max_steps=MAX_STEPS):
+    return np.unique(np.linspace(0, days, min(days, max_steps) + 1).round().astype(np.int64))[1:]
+
+
+# Cumulative log returns at the grid days for a geometric Brownian motion whose daily log
+# returns have the historical mean and covariance. Each step of s days is one exact draw with
+# s times the daily mean and covariance, so a coarse grid loses no accuracy at its points.
+# The second half of the paths mirrors the first (antithetic draws), which halves the random
+# numbers needed and reduces the variance of the simulated mean.
+def gbm_paths(rng, n, grid, mean, chol):
+    lengths = np.diff(grid, prepend=0).astype(np.float32)
+    z = np.empty((n, len(grid), len(mean)), dtype=np.float32)
+    half = (n + 1) // 2
+    rng.standard_normal(out=z[:half], dtype=np.float32)
+    np.negative(z[:n - half], out=z[half:])
+    z *= np.sqrt(lengths)[:, None]
+    x = z @ chol.T
+    x += lengths[:, None] * mean
+    np.cumsum(x, axis=1, out=x)
+    return x
+
+
+# Cumulative log returns at the grid days when the history is resampled in blocks of
+# consecutive days, keeping both the cross-section (correlation) and short-range dependence
+# such as volatility clusters. Sums over blocks come from prefix sums of the history, so only
+# the grid days are ever materialised.
+def bootstrap_paths(rng, n, grid, prefix, block):
+    blocks = grid[-1] // block + 1
+    starts = rng.integers(0, len(prefix) - block, size=(n, blocks))
+    completed = np.zeros((n, blocks, prefix.shape[1]), dtype=np.float32)
+    np.cumsum(prefix[starts[:, :-1] + block] - prefix[starts[:, :-1]], axis=1, out=completed[:, 1:])
+    q, r = grid // block, grid % block
+    x = prefix[starts[:, q] + r]
+    x -= prefix[starts[:, q]]
+    x += completed[:, q]
+    return x
+
+
+# Buy-and-hold portfolio value (starting at 1) along simulated paths, as the simulated days
+# and a paths x steps float32 matrix. Asset returns are generated a chunk of paths at a time
+# on a few threads, turned into growth factors in place and reduced to the portfolio at once.
+def simulate(history, weights, days=252, paths=10_000, method='gbm', block=20, seed=0, budget=CHUNK_BYTES):
+    history = np.asarray(history, dtype=np.float32)
+    weights = np.asarray(weights, dtype=np.float32)
+    if len(history) < 2:
+        raise ValueError("At least two days of returns are needed to simulate")
+    k = history.shape[1]
+    grid = time_grid(days)
+    if method == 'gbm':
+        mean = history.mean(axis=0)
+        cov = np.atleast_2d(np.cov(history.astype(np.float64), rowvar=False))
+        chol = np.linalg.cholesky(cov + np.eye(k) * 1e-12).astype(np.float32)
+        generate = lambda rng, n: gbm_paths(rng, n, grid, mean, chol)
+    elif method == 'bootstrap':
+        block = max(1, min(block, len(history)))
+        prefix = np.zeros((len(history) + 1, k), dtype=np.float32)
+        np.cumsum(history, axis=0, out=prefix[1:])
+        generate = lambda rng, n: bootstrap_paths(rng, n, grid, prefix, block)
+    else:
+        raise ValueError(f"Unknown simulation method: {method}")
+
+    size = chunk_size(len(grid), k, budget)
+    starts = list(range(0, paths, size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    values = np.empty((paths, len(grid)), dtype=np.float32)
+
+    def run_chunk(lo, seed_seq):
+        x = generate(np.random.default_rng(seed_seq), min(size, paths - lo))
+        np.exp(x, out=x)
+        values[lo:lo + len(x)] = x @ weights
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(run_chunk, starts, seeds))
+    return grid, values
+
+
+# Percentile bands of the portfolio value for every simulated day
+def value_bands(values, quantiles=QUANTILES):
+    return np.percentile(values, quantiles, axis=0)
+
+
+# Distribution of the final portfolio value
+def terminal_summary(values, level=5):
+    final = values[:, -1].astype(np.float64)
+    var = 1 - np.percentile(final, level)
+    return {
+        'Median return': np.median(final) - 1,
+        'Mean return': final.mean() - 1,
+        f'Value at risk ({100 - level}%)': var,
+        f'Expected shortfall ({100 - level}%)': 1 - final[final <= 1 - var].mean(),
+        'Probability of loss': (final < 1).mean(),
+    }
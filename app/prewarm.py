@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from config import START, PREWARM_DIR, STORE_DIR, stocks
+from forecast_store import ForecastStore, MAX_YEARS, as_of_date
+from ingest import fetch_batch
+from models import PROPHET, NEURALPROPHET, NEURALPROPHET_GLOBAL
+from store import PriceStore, CsvProvider, YahooProvider
+from usage import popularity
+
+# After-close cache pre-warmer. Once the market has closed it downloads the day's bars for
+# the universe, fits the models (warm-started through the registry) and publishes forecasts,
+# then rebuilds the shared price matrix the Dashboard and Portfolio pages read, so the first
+# visitor of the morning finds everything on disk. The new snapshot is assembled in a staging
+# store first: forecasts are published under the new as-of date, which no page asks for yet,
+# and only then are the price files moved into the live store and the matrix's CURRENT pointer
+# swapped, so a page sees either yesterday's prices with yesterday's forecasts or today's with
+# today's. Tickers are processed most popular first (see usage.py) and every run is appended
+# to data/prewarm/history.jsonl.
+#
+#   python app/prewarm.py                                   # runs every weekday after the close
+#   python app/prewarm.py --now --models prophet neuralprophet_global --workers 4
+#   python app/prewarm.py --now --csv-source data/raw --first AAPL TSLA
+
+MARKET_TZ = 'America/New_York'
+# Late enough for the day's closing auction to be in the daily bars
+RUN_AT = '17:00'
+
+HISTORY_PATH = os.path.join(PREWARM_DIR, 'history.jsonl')
+STAGING_DIR = os.path.join(PREWARM_DIR, 'staging')
+
+
+# Next weekday at run_at in the market's time zone, strictly after now. Market holidays are
+# not skipped: a run on a holiday finds no new bars and only fills gaps.
+def next_run(now, run_at=RUN_AT, tz=MARKET_TZ):
+    local = now.astimezone(ZoneInfo(tz))
+    hour, minute = (int(part) for part in run_at.split(':'))
+    candidate = local.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= local:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+# End (exclusive) of the price downloads: the day in the market's time zone, plus one once
+# the clock is past run_at on a weekday, so the closing bar is taken but a bar still
+# forming during the session never is
+def download_end(now, run_at=RUN_AT, tz=MARKET_TZ):
+    local = now.astimezone(ZoneInfo(tz))
+    hour, minute = (int(part) for part in run_at.split(':'))
+    closed = local.weekday() < 5 and (local.hour, local.minute) >= (hour, minute)
+    return (local.date() + timedelta(days=1 if closed else 0)).strftime("%Y-%m-%d")
+
+
+# The universe in processing order: pinned tickers, then by requests counted in the last
+# weeks, then in universe order
+def priority(tickers, first=(), counts=None):
+    tickers = list(dict.fromkeys(tickers))
+    counts = popularity() if counts is None else counts
+    position = {ticker: i for i, ticker in enumerate(tickers)}
+    pinned = [ticker for ticker in dict.fromkeys(first) if ticker in position]
+    rest = sorted((ticker for ticker in tickers if ticker not in pinned),
+                  key=lambda ticker: (-counts.get(ticker, 0), position[ticker]))
+    return pinned + rest
+
+
+# Top up one batch of tickers in the staging store. Unlike PriceStore.load, after the close
+# the request ends tomorrow, so the bar of the day that just closed is included. A failed
+# download keeps the live data, so the ticker is still part of the snapshot, just not any newer.
+# Only provider errors are retried: an empty answer is normal in a top-up (a ticker already
+# current, a holiday, a delisted symbol) and just means there is nothing new.
+def refresh_batch(provider, batch, live, staged, end, retries, backoff):
+    began = time.perf_counter()
+    current = {ticker: live.read(ticker) for ticker in batch}
+    starts = [START if data is None or data.empty else (data['Date'].max() + timedelta(days=1)).strftime("%Y-%m-%d")
+              for data in current.values()]
+    frames, error = {}, None
+    if min(starts) < end:
+        try:
+            frames, _ = fetch_batch(provider, batch, min(starts), end, retries, backoff, retry_empty=False)
+        except Exception as exc:
+            error = repr(exc)
+    seconds = (time.perf_counter() - began) / len(batch)
+
+    report = []
+    for ticker in batch:
+        old, new = current[ticker], frames.get(ticker)
+        parts = [frame for frame in (old, new) if frame is not None and not frame.empty]
+        if not parts:
+            report.append({'ticker': ticker, 'added': 0, 'as_of': None, 'seconds': seconds, 'error': error})
+            continue
+        data = pd.concat(parts, ignore_index=True).drop_duplicates(subset='Date', keep='last')
+        data = data.sort_values('Date').reset_index(drop=True)
+        staged.write(ticker, data)
+        added = len(data) - (0 if old is None else len(old))
+        report.append({'ticker': ticker, 'added': added, 'as_of': as_of_date(data), 'seconds': seconds,
+                       'error': error})
+    return report
+
+
+def refresh_prices(tickers, provider, live, staged, end, batch_size=20, workers=4, retries=3, backoff=2.0):
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+    report = []
+    # Batches are submitted in priority order, so the popular tickers are downloaded first
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(refresh_batch, provider, batch, live, staged, end, retries, backoff)
+                   for batch in batches]
+        for future in as_completed(futures):
+            for row in future.result():
+                report.append(row)
+                status = 'ok' if row['error'] is None else f"FAILED ({row['error']})"
+                print(f"{row['ticker']:<6} {'prices':<20} {row['seconds']:7.2f}s  +{row['added']} rows  {status}")
+    return report
+
+
+# Move the staged price files into the live store one atomic rename at a time, then swap in
+# a matrix of every stock in the store, so a run over a few tickers keeps the others. Forecasts
+# for old as-of dates are dropped like old matrix versions.
+def publish(tickers, staged, live, forecasts):
+    from shared_prices import build_from_store
+
+    for ticker in tickers:
+        os.replace(staged.path(ticker), live.path(ticker))
+    matrix = build_from_store(live, [ticker for ticker in stocks if os.path.exists(live.path(ticker))])
+    forecasts.prune()
+    return matrix
+
+
+def append_history(entry, path=HISTORY_PATH, keep=200):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = []
+    if os.path.exists(path):
+        with open(path) as handle:
+            lines = handle.read().splitlines()
+    lines = (lines + [json.dumps(entry)])[-keep:]
+    with open(f"{path}.tmp", 'w') as handle:
+        handle.write('\n'.join(lines) + '\n')
+    os.replace(f"{path}.tmp", path)
+
+
+# One pre-warm: refresh, forecast, publish. Returns the run's history entry.
+def run(tickers=stocks, model_types=(PROPHET,), provider=None, first=(), batch_size=20,
+        download_workers=4, workers=None, threads_per_worker=1, keep_history=200, history_path=HISTORY_PATH,
+        run_at=RUN_AT, tz=MARKET_TZ):
+    import batch_forecast
+    from registry import forecast_params
+
+    provider = provider if provider is not None else YahooProvider()
+    run_id = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    staging = os.path.join(STAGING_DIR, run_id)
+    live = PriceStore(provider, STORE_DIR)
+    staged = PriceStore(provider, os.path.join(staging, 'store'))
+    forecasts = ForecastStore()
+    entry = {'run': run_id, 'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+             'models': list(model_types), 'steps': {}, 'failed': []}
+    began = time.perf_counter()
+    try:
+        ordered = priority(tickers, first)
+
+        step = time.perf_counter()
+        end = download_end(datetime.now(timezone.utc), run_at, tz)
+        prices = refresh_prices(ordered, provider, live, staged, end, batch_size, download_workers)
+        as_of = {row['ticker']: row['as_of'] for row in prices if row['as_of'] is not None}
+        ready = [ticker for ticker in ordered if ticker in as_of]
+        entry['steps']['prices'] = {'seconds': round(time.perf_counter() - step, 2), 'tickers': len(ready),
+                                    'rows_added': sum(row['added'] for row in prices)}
+        entry['failed'] += [f"{row['ticker']}/prices" for row in prices if row['error'] is not None]
+
+        # Only tickers missing a forecast for their new as-of date and current settings are
+        # fitted, so a rerun or a holiday run costs little; the registry warm-starts the rest
+        step = time.perf_counter()
+        todo = [ticker for ticker in ready
+                if any(not forecasts.has(ticker, model_type, as_of[ticker], forecast_params(ticker, model_type))
+                       for model_type in model_types)]
+        report = []
+        if todo:
+            _, report = batch_forecast.run(todo, model_types, MAX_YEARS, os.path.join(staging, 'forecasts.parquet'),
+                                           workers, threads_per_worker, publish=True, store_dir=staged.folder)
+        entry['steps']['forecasts'] = {'seconds': round(time.perf_counter() - step, 2), 'tickers': len(todo),
+                                       'written': sum(error is None for *_, error in report)}
+        entry['failed'] += [f"{ticker}/{model_type}" for ticker, model_type, _, error in report if error is not None]
+
+        step = time.perf_counter()
+        matrix = publish(ready, staged, live, forecasts) if ready else None
+        entry['steps']['publish'] = {'seconds': round(time.perf_counter() - step, 2),
+                                     'matrix': os.path.basename(matrix) if matrix else None}
+        entry['status'] = 'ok' if not entry['failed'] else 'partial'
+    except Exception as exc:
+        entry['status'], entry['error'] = 'failed', repr(exc)
+        raise
+    finally:
+        entry['seconds'] = round(time.perf_counter() - began, 2)
+        append_history(entry, history_path, keep_history)
+        shutil.rmtree(staging, ignore_errors=True)
+    return entry
+
+
+# Sleep until each scheduled time and run; a failed run is recorded and the schedule goes on
+def serve(run_at=RUN_AT, tz=MARKET_TZ, **options):
+    while True:
+        at = next_run(datetime.now(timezone.utc), run_at, tz)
+        print(f"Next pre-warm at {at:%Y-%m-%d %H:%M %Z}")
+        # Short sleeps, so a suspended machine or a clock change does not delay the run
+        while (remaining := (at - datetime.now(timezone.utc)).total_seconds()) > 0:
+            time.sleep(min(remaining, 60))
+        try:
+            entry = run(**options, run_at=run_at, tz=tz)
+            print(f"Pre-warm {entry['run']} {entry['status']} in {entry['seconds']:.1f}s")
+        except Exception as exc:
+            print(f"Pre-warm FAILED ({exc!r})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Refresh prices, models and forecasts after the market close")
+    parser.add_argument('--now', action='store_true', help="Run once right away instead of on the schedule")
+    parser.add_argument('--run-at', default=RUN_AT, help="Time of day of the scheduled runs, HH:MM")
+    parser.add_argument('--timezone', default=MARKET_TZ)
+    parser.add_argument('--tickers', nargs='*', default=list(stocks))
+    parser.add_argument('--models', nargs='*', default=[PROPHET], choices=[PROPHET, NEURALPROPHET, NEURALPROPHET_GLOBAL])
+    parser.add_argument('--first', nargs='*', default=[], help="Tickers processed before the popular ones")
+    parser.add_argument('--batch-size', type=int, default=20, help="Tickers per download request")
+    parser.add_argument('--download-workers', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=None, help="Fitting processes, defaults to one per core")
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--keep-history', type=int, default=200, help="Runs kept in the history file")
+    parser.add_argument('--csv-source', default=None, help="Read prices from a folder of <TICKER>_data.csv files")
+    args = parser.parse_args()
+
+    options = dict(tickers=args.tickers, model_types=args.models,
+                   provider=CsvProvider(args.csv_source) if args.csv_source else None, first=args.first,
+                   batch_size=args.batch_size, download_workers=args.download_workers, workers=args.workers,
+                   threads_per_worker=args.threads_per_worker, keep_history=args.keep_history)
+    if not args.now:
+        serve(args.run_at, args.timezone, **options)
+    # Run during the session, --now refreshes up to the previous close only
+    entry = run(**options, run_at=args.run_at, tz=args.timezone)
+    print(f"\nPre-warm {entry['run']} {entry['status']} in {entry['seconds']:.1f}s: {json.dumps(entry['steps'])}")
+    if entry['failed']:
+        print(f"Failed: {', '.join(entry['failed'])}")
+        raise SystemExit(1)
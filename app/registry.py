@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+from config import MODEL_DIR
+from models import PROPHET, NEURALPROPHET, NEURALPROPHET_GLOBAL, model_params, fit_model, update_model
+from tuning import tuned_params
+
+
+# Registry name of the model trained on every ticker at once
+UNIVERSE = '*'
+
+
+# Hyperparameters a fit uses: the ones given, else the ticker's tuned ones, else the defaults
+def resolve_params(ticker, model_type, params=None):
+    if params is None:
+        params = tuned_params(ticker, model_type)
+    return model_params(model_type, params)
+
+
+# Hyperparameters behind a ticker's forecast; the global model is registered for the universe
+def forecast_params(ticker, model_type):
+    return resolve_params(UNIVERSE if model_type == NEURALPROPHET_GLOBAL else ticker, model_type)
+
+
+# Fingerprint of the training frame, so new or corrected prices produce a new key
+def data_hash(df_train):
+    columns = ['ds', 'y', 'ID'] if 'ID' in df_train.columns else ['ds', 'y']
+    hashed = pd.util.hash_pandas_object(df_train[columns], index=False)
+    return hashlib.sha256(hashed.values.tobytes()).hexdigest()[:16]
+
+
+def model_key(ticker, model_type, params, df_hash):
+    payload = json.dumps({'ticker': ticker, 'model': model_type, 'params': params, 'data': df_hash},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+# Key shared by every fit of one ticker/model/params, whatever data it was trained on
+def family_key(ticker, model_type, params):
+    return model_key(ticker, model_type, params, None)
+
+
+def save_model(m, model_type, path):
+    if model_type == PROPHET:
+        from prophet.serialize import model_to_json
+        with open(path, 'w') as handle:
+            handle.write(model_to_json(m))
+    else:
+        from neuralprophet import save
+        save(m, path)
+
+
+def load_model(model_type, path):
+    if model_type == PROPHET:
+        from prophet.serialize import model_from_json
+        with open(path) as handle:
+            return model_from_json(handle.read())
+    from neuralprophet import load
+    return load(path)
+
+
+# Exclusive lock on a file shared by every process; where fcntl is missing (Windows),
+# only the threads of one process are serialised
+@contextmanager
+def file_lock(path):
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+# Fitted models serialized to disk, keyed by ticker, model type, hyperparameters
+# and training data, with least-recently-used eviction once the folder grows too big.
+# The index is shared by the app, the batch workers, the API and the pre-warmer, so every
+# change re-reads it under a file lock and writes it back merged.
+class ModelRegistry:
+    EXTENSIONS = {PROPHET: 'json', NEURALPROPHET: 'np', NEURALPROPHET_GLOBAL: 'np'}
+
+    def __init__(self, folder=MODEL_DIR, max_bytes=2 * 1024 ** 3, memory_size=8):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        # The most recent models also stay deserialized, so moving the horizon slider is instant
+        self.memory = OrderedDict()
+        self.memory_size = memory_size
+        self.index_path = os.path.join(folder, 'index.json')
+        self.lock_path = os.path.join(folder, 'index.lock')
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.warm_starts = 0
+        self.full_refits = 0
+        os.makedirs(folder, exist_ok=True)
+        self.index = self.read_index()
+
+    def read_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path) as handle:
+                return json.load(handle)
+        except ValueError:
+            return {}
+
+    def write_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as handle:
+            json.dump(self.index, handle)
+        os.replace(tmp_path, self.index_path)
+
+    # Apply a change to the latest index on disk, with every other writer locked out
+    @contextmanager
+    def updating(self):
+        with self.lock, file_lock(self.lock_path):
+            self.index = self.read_index()
+            yield self.index
+            self.write_index()
+
+    def path(self, key, model_type):
+        return os.path.join(self.folder, f"{key}.{self.EXTENSIONS[model_type]}")
+
+    def remember(self, key, m):
+        with self.lock:
+            self.memory[key] = m
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+
+    def get(self, key, model_type):
+        path = self.path(key, model_type)
+        if not os.path.exists(path):
+            return None
+        m = self.memory.get(key)
+        if m is None:
+            m = load_model(model_type, path)
+        self.remember(key, m)
+        with self.updating() as index:
+            entry = index.setdefault(key, {'model': model_type, 'size': os.path.getsize(path)})
+            entry['last_access'] = time.time()
+        return m
+
+    def put(self, key, model_type, m, ticker=None, family=None, df_train=None):
+        path = self.path(key, model_type)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        save_model(m, model_type, tmp_path)
+        os.replace(tmp_path, path)
+        self.remember(key, m)
+        with self.updating() as index:
+            index[key] = {'model': model_type, 'ticker': ticker, 'size': os.path.getsize(path),
+                          'last_access': time.time(), 'family': family}
+            if df_train is not None:
+                # Remember what the model saw, so later data that extends it can warm-start from it
+                index[key]['rows'] = len(df_train)
+                index[key]['data'] = data_hash(df_train)
+            self.evict()
+
+    # Drop the least recently used models until the folder fits in max_bytes; called while
+    # updating, so the totals cover the models of every process
+    def evict(self):
+        total = sum(entry['size'] for entry in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1].get('last_access', 0)):
+            if total <= self.max_bytes:
+                break
+            path = self.path(key, entry['model'])
+            if os.path.exists(path):
+                os.remove(path)
+            total -= entry['size']
+            del self.index[key]
+            self.memory.pop(key, None)
+            self.evictions += 1
+
+    # Most recent model of the same family whose training data is a prefix of df_train
+    def find_previous(self, family, df_train):
+        with self.lock:
+            self.index = self.read_index()
+            candidates = [(key, entry) for key, entry in self.index.items()
+                          if entry.get('family') == family and 0 < entry.get('rows', 0) < len(df_train)]
+        for key, entry in sorted(candidates, key=lambda item: item[1]['rows'], reverse=True):
+            path = self.path(key, entry['model'])
+            if os.path.exists(path) and data_hash(df_train.iloc[:entry['rows']]) == entry['data']:
+                return path, entry['rows']
+        return None, 0
+
+    # Return a fitted model, only training one when this exact configuration has not been seen.
+    # With warm_start, a model fitted on an earlier prefix of the data is updated instead of refitted.
+    # Without explicit params, the ticker's tuned settings are used when tuning has produced some.
+    def get_or_fit(self, ticker, model_type, df_train, params=None, warm_start=True, settings=None):
+        params = resolve_params(ticker, model_type, params)
+        key = model_key(ticker, model_type, params, data_hash(df_train))
+        m = self.get(key, model_type)
+        if m is not None:
+            self.hits += 1
+            return m
+        self.misses += 1
+
+        family = family_key(ticker, model_type, params)
+        previous_path, previous_rows = self.find_previous(family, df_train) if warm_start else (None, 0)
+        if previous_path is None:
+            m = fit_model(model_type, df_train, params)
+            self.full_refits += 1
+        else:
+            # Load a fresh copy from disk, since NeuralProphet keeps training the object in place
+            m_prev = load_model(model_type, previous_path)
+            m, mode = update_model(model_type, m_prev, df_train, previous_rows, params, settings)
+            if mode == 'warm':
+                self.warm_starts += 1
+            else:
+                self.full_refits += 1
+        self.put(key, model_type, m, ticker, family, df_train)
+        return m
+
+    # The global model is registered once for the whole universe. Its panel grows inside every
+    # series rather than at the end, so it is refitted instead of warm-started.
+    def get_or_fit_global(self, df_panel, params=None):
+        return self.get_or_fit(UNIVERSE, NEURALPROPHET_GLOBAL, df_panel, params, warm_start=False)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'warm_starts': self.warm_starts,
+                'full_refits': self.full_refits,
+                'models': len(self.index),
+                'bytes': sum(entry['size'] for entry in self.index.values()),
+            }
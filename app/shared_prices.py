@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import CLEAN_DIR, MATRIX_DIR, stocks
+
+# Read-only, date-indexed price matrix for the whole universe, saved as .npy files and
+# memory-mapped, so every session and every app process shares the same pages in memory
+#
+#   python app/shared_prices.py --from-csv data/clean/combined_stock_data.csv
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+
+# Save a (field, ticker, date) float32 matrix as a new version and point CURRENT at it.
+# Readers that already mapped the previous version keep using it until they reload.
+def write_matrix(tickers, dates, values, folder=MATRIX_DIR):
+    version = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    target = os.path.join(folder, version)
+    os.makedirs(target, exist_ok=True)
+    np.save(os.path.join(target, 'prices.npy'), values.astype(np.float32, copy=False))
+    np.save(os.path.join(target, 'dates.npy'), np.asarray(dates, dtype='datetime64[ns]'))
+    with open(os.path.join(target, 'tickers.json'), 'w') as handle:
+        json.dump(list(tickers), handle)
+
+    pointer = os.path.join(folder, 'CURRENT')
+    with open(f"{pointer}.tmp", 'w') as handle:
+        handle.write(version)
+    os.replace(f"{pointer}.tmp", pointer)
+    prune(folder)
+    return target
+
+
+# Remove all but the newest versions; processes still mapping a removed version keep
+# their pages until they switch, since unlinking does not invalidate a mapping
+def prune(folder=MATRIX_DIR, keep=2):
+    versions = sorted(name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name)))
+    for name in versions[:-keep]:
+        shutil.rmtree(os.path.join(folder, name), ignore_errors=True)
+
+
+# Build the matrix from the long Date/.../Ticker table in two streaming passes:
+# one to collect the dates and tickers, one to fill the values
+def build_from_csv(path=os.path.join(CLEAN_DIR, 'combined_stock_data.csv'), folder=MATRIX_DIR, chunksize=200_000):
+    dates, tickers = set(), set()
+    for chunk in pd.read_csv(path, usecols=['Date', 'Ticker'], chunksize=chunksize):
+        dates.update(pd.to_datetime(chunk['Date']).values)
+        tickers.update(chunk['Ticker'].unique())
+    dates = np.array(sorted(dates), dtype='datetime64[ns]')
+    tickers = sorted(tickers)
+    position = {ticker: i for i, ticker in enumerate(tickers)}
+
+    values = np.full((len(FIELDS), len(tickers), len(dates)), np.nan, dtype=np.float32)
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        rows = chunk['Ticker'].map(position).values
+        cols = np.searchsorted(dates, pd.to_datetime(chunk['Date']).values)
+        for f, field in enumerate(FIELDS):
+            if field in chunk.columns:
+                values[f, rows, cols] = chunk[field].values
+    return write_matrix(tickers, dates, values, folder)
+
+
+# Build the matrix from the Parquet price store, one ticker at a time
+def build_from_store(store, tickers=stocks, folder=MATRIX_DIR):
+    tickers = sorted(set(tickers))
+    frames = {ticker: store.load(ticker) for ticker in tickers}
+    frames = {ticker: data for ticker, data in frames.items() if not data.empty}
+    dates = np.unique(np.concatenate([data['Date'].values for data in frames.values()])).astype('datetime64[ns]')
+    tickers = sorted(frames)
+
+    values = np.full((len(FIELDS), len(tickers), len(dates)), np.nan, dtype=np.float32)
+    for t, ticker in enumerate(tickers):
+        data = frames[ticker]
+        cols = np.searchsorted(dates, data['Date'].values)
+        for f, field in enumerate(FIELDS):
+            values[f, t, cols] = data[field].values
+    return write_matrix(tickers, dates, values, folder)
+
+
+class SharedPrices:
+    def __init__(self, folder=MATRIX_DIR):
+        with open(os.path.join(folder, 'CURRENT')) as handle:
+            self.version = handle.read().strip()
+        path = os.path.join(folder, self.version)
+        self.values = np.load(os.path.join(path, 'prices.npy'), mmap_mode='r')
+        self.dates = np.load(os.path.join(path, 'dates.npy'))
+        with open(os.path.join(path, 'tickers.json')) as handle:
+            self.tickers = json.load(handle)
+        self.position = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def __contains__(self, ticker):
+        return ticker in self.position
+
+    # Column bounds [lo, hi) of the dates inside [start, end]
+    def bounds(self, start=None, end=None):
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns')))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right'))
+        return lo, max(lo, hi)
+
+    # One ticker's prices over a date range, as a view into the mapped file
+    def series(self, ticker, start=None, end=None, field='Close'):
+        lo, hi = self.bounds(start, end)
+        return self.values[FIELDS.index(field), self.position[ticker], lo:hi]
+
+    # Ticker x date block for a selection. Tickers that sit next to each other in the
+    # matrix come back as a view; an arbitrary selection is gathered into a copy of
+    # just the requested block.
+    def window(self, tickers, start=None, end=None, field='Close'):
+        lo, hi = self.bounds(start, end)
+        f = FIELDS.index(field)
+        rows = [self.position[ticker] for ticker in tickers]
+        if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+            return self.values[f, rows[0]:rows[0] + len(rows), lo:hi]
+        return self.values[f, rows, lo:hi]
+
+    def frame(self, ticker, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        data = pd.DataFrame(self.values[:, self.position[ticker], lo:hi].T, columns=FIELDS)
+        data.insert(0, 'Date', self.dates[lo:hi])
+        return data.dropna(subset=['Close']).reset_index(drop=True)
+
+
+# Process-wide instance, reloaded only when CURRENT points at a new version
+shared = {}
+shared_lock = threading.Lock()
+
+
+def shared_prices(folder=MATRIX_DIR):
+    pointer = os.path.join(folder, 'CURRENT')
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as handle:
+        version = handle.read().strip()
+    with shared_lock:
+        current = shared.get(folder)
+        if current is None or current.version != version:
+            current = SharedPrices(folder)
+            shared[folder] = current
+    return current
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the memory-mapped price matrix")
+    parser.add_argument('--from-csv', default=None, help="Combined Date/.../Ticker CSV to convert")
+    parser.add_argument('--from-store', action='store_true', help="Build from the Parquet price store instead")
+    parser.add_argument('--folder', default=MATRIX_DIR)
+    args = parser.parse_args()
+
+    if args.from_store:
+        from store import PriceStore
+        target = build_from_store(PriceStore(), folder=args.folder)
+    else:
+        target = build_from_csv(args.from_csv or os.path.join(CLEAN_DIR, 'combined_stock_data.csv'), args.folder)
+    print(f"Price matrix written to {target}")
@@ -0,0 +1,75 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Measures the cold start of the Streamlit entry point: a fresh interpreter imports
+# main.py and renders the Home page, as a new pod does for its first visitor. Fails when
+# that takes longer than the budget or pulls in a module that should only load on the
+# page that uses it.
+#
+#   python app/startup_budget.py --budget 2.0
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BUDGET_SECONDS = 2.0
+
+# Heavy dependencies no page but their own may import (streamlit itself already brings in
+# PIL and plotly, so those are part of the floor rather than of this list)
+LAZY_MODULES = ['prophet', 'neuralprophet', 'torch', 'pytorch_lightning', 'yfinance', 'GoogleNews',
+                'aiohttp', 'bs4', 'pyarrow']
+
+CHILD = f"""
+import sys, time
+began = time.perf_counter()
+sys.path.insert(0, {APP_DIR!r})
+import main
+main.main()
+print('elapsed', time.perf_counter() - began)
+print('modules', ' '.join(sorted({{name.split('.')[0] for name in sys.modules}})))
+"""
+
+
+# Modules imported directly by main.py (one level below it in the import tree) with
+# their cumulative time in seconds
+def top_imports(stderr):
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # -X importtime lists a module after everything it imported
+        if depth == 1:
+            children.append((name.strip(), int(cumulative) / 1e6))
+        elif depth == 0:
+            if name.strip() == 'main':
+                return sorted(children, key=lambda item: item[1], reverse=True)
+            children = []
+    return []
+
+
+def measure():
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD], capture_output=True, text=True,
+                            env={**os.environ, 'STREAMLIT_GLOBAL_SHOW_WARNING_ON_DIRECT_EXECUTION': 'false'})
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    report = dict(line.split(' ', 1) for line in result.stdout.splitlines() if line.startswith(('elapsed', 'modules')))
+    return float(report['elapsed']), set(report['modules'].split()), top_imports(result.stderr)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the Streamlit app's cold-start import time")
+    parser.add_argument('--budget', type=float, default=BUDGET_SECONDS, help="Seconds allowed to render Home")
+    parser.add_argument('--top', type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    elapsed, modules, imports = measure()
+    for name, seconds in imports[:args.top]:
+        print(f"{name:<30} {seconds:6.3f}s")
+    loaded = [name for name in LAZY_MODULES if name in modules]
+    print(f"\nHome rendered in {elapsed:.2f}s (budget {args.budget:.2f}s)")
+    if loaded:
+        print(f"Imported at startup but should load lazily: {', '.join(loaded)}")
+    if elapsed > args.budget or loaded:
+        raise SystemExit(1)
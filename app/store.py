@@ -0,0 +1,134 @@
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from config import START, RAW_DIR, STORE_DIR
+
+# Columns kept for every ticker, in the order yf.download returns them
+COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+
+def empty_frame():
+    return pd.DataFrame({col: pd.Series(dtype='datetime64[ns]' if col == 'Date' else 'float64') for col in COLUMNS})
+
+
+# Bring a downloaded frame into the flat Date/Open/.../Volume layout the app uses
+def normalize_frame(data):
+    if data is None or data.empty:
+        return empty_frame()
+    data = data.copy()
+    if isinstance(data.columns, pd.MultiIndex):
+        # Newer yfinance versions return (field, ticker) columns even for one symbol
+        data.columns = data.columns.get_level_values(0)
+    if 'Date' not in data.columns:
+        data = data.reset_index()
+        data = data.rename(columns={data.columns[0]: 'Date'})
+    data['Date'] = pd.to_datetime(data['Date']).dt.tz_localize(None)
+    for col in COLUMNS:
+        if col not in data.columns:
+            data[col] = float('nan')
+    return data[COLUMNS].sort_values('Date').reset_index(drop=True)
+
+
+# Yahoo spells share classes with a dash (BRK-B) where the app uses a dot (BRK.B)
+def yahoo_symbol(ticker):
+    return ticker.replace('.', '-')
+
+
+# Price provider backed by Yahoo Finance
+class YahooProvider:
+    def fetch(self, ticker, start, end):
+        import yfinance as yf
+
+        data = yf.download(yahoo_symbol(ticker), start, end, progress=False, auto_adjust=False)
+        return normalize_frame(data)
+
+    # Download several tickers in one request and split the result per ticker
+    def fetch_many(self, tickers, start, end):
+        import yfinance as yf
+
+        symbols = [yahoo_symbol(ticker) for ticker in tickers]
+        data = yf.download(symbols, start, end, progress=False, auto_adjust=False,
+                           group_by='ticker', threads=False)
+        frames = {}
+        for ticker, symbol in zip(tickers, symbols):
+            if isinstance(data.columns, pd.MultiIndex) and symbol in data.columns.get_level_values(0):
+                frames[ticker] = normalize_frame(data[symbol].dropna(how='all'))
+            else:
+                frames[ticker] = empty_frame()
+        return frames
+
+
+# Price provider that reads the data/raw/<TICKER>_data.csv layout, used offline and in tests
+class CsvProvider:
+    def __init__(self, folder=RAW_DIR):
+        self.folder = folder
+
+    def fetch(self, ticker, start, end):
+        path = os.path.join(self.folder, f"{ticker}_data.csv")
+        if not os.path.exists(path):
+            return empty_frame()
+        data = normalize_frame(pd.read_csv(path))
+        mask = (data['Date'] >= pd.Timestamp(start)) & (data['Date'] < pd.Timestamp(end))
+        return data[mask].reset_index(drop=True)
+
+    def fetch_many(self, tickers, start, end):
+        return {ticker: self.fetch(ticker, start, end) for ticker in tickers}
+
+
+# On-disk Parquet store with one file per ticker, topped up with only the missing trailing days
+class PriceStore:
+    def __init__(self, provider=None, folder=STORE_DIR):
+        self.provider = provider if provider is not None else YahooProvider()
+        self.folder = folder
+        os.makedirs(self.folder, exist_ok=True)
+
+    def path(self, ticker):
+        return os.path.join(self.folder, f"{ticker}.parquet")
+
+    def read(self, ticker):
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def write(self, ticker, data):
+        # Write to a temporary file first so concurrent readers never see a partial file
+        path = self.path(ticker)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    # The store counts as checked for the day once its file was written or touched today
+    def checked_today(self, ticker, today):
+        mtime = datetime.fromtimestamp(os.path.getmtime(self.path(ticker))).date()
+        return mtime >= today
+
+    def load(self, ticker, start=START, end=None):
+        today = date.today()
+        data = self.read(ticker)
+
+        if data is None or (data.empty and not self.checked_today(ticker, today)):
+            # An empty result is stored too, so a symbol without data is asked for at most once a day
+            data = self.provider.fetch(ticker, START, today.strftime("%Y-%m-%d"))
+            self.write(ticker, data)
+        elif not data.empty and not self.checked_today(ticker, today):
+            # Only ask the provider for the days after the last stored bar
+            last = data['Date'].max()
+            top_up_start = (last + timedelta(days=1)).strftime("%Y-%m-%d")
+            new_rows = self.provider.fetch(ticker, top_up_start, today.strftime("%Y-%m-%d"))
+            if new_rows.empty:
+                os.utime(self.path(ticker))
+            else:
+                data = pd.concat([data, new_rows], ignore_index=True)
+                data = data.drop_duplicates(subset='Date', keep='last').reset_index(drop=True)
+                self.write(ticker, data)
+
+        # Without an end, every stored bar counts: downloads stop before today, so the only
+        # bars of today are the closing ones the pre-warmer fetches after the close
+        mask = data['Date'] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= data['Date'] < pd.Timestamp(end)
+        return data[mask].reset_index(drop=True)
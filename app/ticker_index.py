@@ -0,0 +1,89 @@
+import re
+
+from config import stocks
+
+# Resolves which tickers of the universe a headline mentions, for every ticker in one
+# pass over the text. Bare tickers only count as whole uppercase words, and tickers that
+# are also ordinary words or initials (T, C, V, MA, ...) only count in explicit forms
+# such as $T, (T) or NYSE: T. Company names are matched as capitalised proper nouns.
+
+COMPANY_NAMES = {
+    'TSLA': ['Tesla'], 'AAPL': ['Apple'], 'MSFT': ['Microsoft'], 'AMZN': ['Amazon'],
+    'GOOGL': ['Alphabet', 'Google'], 'GOOG': [], 'FB': ['Meta Platforms', 'Facebook'],
+    'BRK.B': ['Berkshire Hathaway', 'Berkshire'], 'JNJ': ['Johnson & Johnson', 'J&J'], 'NVDA': ['Nvidia'],
+    'JPM': ['JPMorgan', 'JP Morgan'], 'UNH': ['UnitedHealth'], 'V': ['Visa'], 'PG': ['Procter & Gamble', 'P&G'],
+    'HD': ['Home Depot'], 'MA': ['Mastercard'], 'PFE': ['Pfizer'], 'BAC': ['Bank of America'],
+    'DIS': ['Disney'], 'VZ': ['Verizon'], 'KO': ['Coca-Cola', 'Coca Cola'], 'NFLX': ['Netflix'],
+    'INTC': ['Intel'], 'MRK': ['Merck'], 'CSCO': ['Cisco'], 'T': ['AT&T'], 'CMCSA': ['Comcast'],
+    'CVX': ['Chevron'], 'XOM': ['Exxon Mobil', 'ExxonMobil', 'Exxon'], 'PEP': ['PepsiCo', 'Pepsi'],
+    'ABT': ['Abbott Laboratories', 'Abbott'], 'ADBE': ['Adobe'], 'WMT': ['Walmart'], 'NKE': ['Nike'],
+    'PYPL': ['PayPal'], 'TMO': ['Thermo Fisher'], 'CRM': ['Salesforce'], 'ORCL': ['Oracle'],
+    'MCD': ["McDonald's", 'McDonalds'], 'MDT': ['Medtronic'], 'COST': ['Costco'], 'AXP': ['American Express', 'Amex'],
+    'LLY': ['Eli Lilly', 'Lilly'], 'BMY': ['Bristol-Myers Squibb', 'Bristol Myers'], 'QCOM': ['Qualcomm'],
+    'DHR': ['Danaher'], 'TXN': ['Texas Instruments'], 'UNP': ['Union Pacific'], 'UPS': ['United Parcel Service'],
+    'LIN': ['Linde'], 'SBUX': ['Starbucks'], 'HON': ['Honeywell'], 'AVGO': ['Broadcom'], 'AMGN': ['Amgen'],
+    'CAT': ['Caterpillar'], 'AMT': ['American Tower'], 'GILD': ['Gilead'], 'GS': ['Goldman Sachs', 'Goldman'],
+    'SCHW': ['Charles Schwab', 'Schwab'], 'BKNG': ['Booking Holdings'], 'MS': ['Morgan Stanley'],
+    'ISRG': ['Intuitive Surgical'], 'SPGI': ['S&P Global'], 'ZTS': ['Zoetis'], 'INTU': ['Intuit'],
+    'FIS': ['Fidelity National Information'], 'USB': ['U.S. Bancorp', 'US Bancorp'], 'RTX': ['Raytheon'],
+    'DE': ['Deere'], 'C': ['Citigroup', 'Citi'], 'BLK': ['BlackRock'], 'PLD': ['Prologis'], 'MMM': ['3M'],
+    'IBM': [], 'NOW': ['ServiceNow'], 'SYK': ['Stryker'], 'CB': ['Chubb'], 'MO': ['Altria'],
+    'EL': ['Estee Lauder', 'Estée Lauder'], 'BA': ['Boeing'], 'ADP': ['Automatic Data Processing'],
+    'CI': ['Cigna'], 'CL': ['Colgate-Palmolive', 'Colgate'], 'SO': ['Southern Company'], 'MRNA': ['Moderna'],
+    'LMT': ['Lockheed Martin', 'Lockheed'], 'TGT': ['Target Corp'], 'ADI': ['Analog Devices'],
+    'GE': ['General Electric', 'GE Aerospace'], 'ABBV': ['AbbVie'], 'WFC': ['Wells Fargo'], 'CVS': ['CVS Health'],
+    'LRCX': ['Lam Research'], 'WM': ['Waste Management'], 'PGR': ['Progressive Corp'],
+    'EW': ['Edwards Lifesciences'], 'ITW': ['Illinois Tool Works'], 'CME': ['CME Group'],
+    'NEE': ['NextEra'], 'AON': [], 'FISV': ['Fiserv'], 'TRV': ['Travelers'],
+}
+
+# Tickers that read as plain words or initials and therefore need an explicit form
+AMBIGUOUS = {ticker for ticker in stocks if len(ticker) <= 2} | {'NOW', 'CAT', 'COST', 'LIN', 'DIS', 'PEP'}
+
+EXCHANGE_PREFIX = r'(?:NYSE|NASDAQ|Nasdaq|NYSEARCA)\s*:\s*'
+
+
+class TickerIndex:
+    def __init__(self, tickers=stocks, names=COMPANY_NAMES):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.by_symbol = {}
+        self.by_name = {}
+        for ticker in self.tickers:
+            for symbol in {ticker, ticker.replace('.', '-')}:
+                self.by_symbol[symbol] = ticker
+            for name in names.get(ticker, []):
+                self.by_name[name] = ticker
+
+        # Longest alternatives first, so GOOGL wins over GOOG and "Bank of America" over shorter names
+        def alternation(words):
+            return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+        symbols = alternation(self.by_symbol)
+        plain = alternation(symbol for symbol, ticker in self.by_symbol.items() if ticker not in AMBIGUOUS)
+        company = alternation(self.by_name)
+        patterns = [
+            rf'\$(?P<cashtag>{symbols})(?![\w.-])',
+            rf'\((?P<paren>{symbols})\)',
+            rf'{EXCHANGE_PREFIX}(?P<listed>{symbols})(?![\w.-])',
+            rf'(?<![\w$&.-])(?P<plain>{plain})(?![\w&-]|\.\w)',
+        ]
+        if company:
+            patterns.append(rf'(?<![\w&])(?P<name>{company})(?![\w&])')
+        self.pattern = re.compile('|'.join(patterns))
+
+    # Tickers mentioned in a piece of text, in order of first mention
+    def tickers_in(self, text):
+        found = {}
+        for match in self.pattern.finditer(text):
+            lookup = self.by_name if match.lastgroup == 'name' else self.by_symbol
+            ticker = lookup[match.group(match.lastgroup)]
+            found.setdefault(ticker, None)
+        return list(found)
+
+    # Map every ticker of the universe to the stories whose title mentions it
+    def index(self, stories):
+        index = {ticker: [] for ticker in self.tickers}
+        for story in stories:
+            for ticker in self.tickers_in(story['title']):
+                index[ticker].append(story)
+        return index
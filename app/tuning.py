@@ -0,0 +1,285 @@
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from config import TUNING_DIR, sectors
+from models import PROPHET, NEURALPROPHET, model_params
+
+# Hyperparameter search for the Prophet and NeuralProphet models, per ticker or per sector.
+# Candidates are scored on the backtest's walk-forward folds with successive halving: every
+# candidate is scored on the most recent fold, the best third go on to three folds, the best
+# third of those to nine, and so on, so most of the budget goes to the promising settings.
+# Every scored fold is kept in a trial cache, so reruns and later rungs never refit it.
+# Winners are written to data/tuning/best_params.json, which the model registry reads, so
+# the Prediction page, the batch engine and the API use them without further changes.
+#
+#   python app/tuning.py --models prophet --tickers AAPL MSFT --trials 27
+#   python app/tuning.py --models neuralprophet --sectors Energy Utilities --workers 8
+
+TRIALS_PATH = os.path.join(TUNING_DIR, 'trials.jsonl')
+BEST_PATH = os.path.join(TUNING_DIR, 'best_params.json')
+
+# Values tried for each hyperparameter. NeuralProphet's AR lags (n_lags) are left out: the
+# Prediction page forecasts up to four years in one pass, which an autoregressive model can
+# only do by rolling its own predictions forward.
+SEARCH_SPACE = {
+    PROPHET: {
+        'changepoint_prior_scale': [0.001, 0.01, 0.05, 0.1, 0.5],
+        'seasonality_mode': ['additive', 'multiplicative'],
+        'yearly_seasonality': [5, 10, 20],
+        'weekly_seasonality': [False, 3],
+    },
+    NEURALPROPHET: {
+        'epochs': [20, 50, 100],
+        'learning_rate': [0.003, 0.01, 0.03, 0.1],
+        'seasonality_mode': ['additive', 'multiplicative'],
+        'yearly_seasonality': [5, 10, 20],
+        'weekly_seasonality': [False, 3],
+    },
+}
+
+SECTOR_OF = {ticker: sector for sector, tickers in sectors.items() for ticker in tickers}
+
+
+def params_key(model_type, params):
+    payload = json.dumps({'model': model_type, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+# The current defaults plus a seeded sample of the grid, so a winner is never worse than
+# the defaults on the folds it was scored on
+def candidates(model_type, n_trials, seed=0):
+    space = SEARCH_SPACE[model_type]
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    sample = random.Random(seed).sample(grid, min(max(n_trials - 1, 0), len(grid)))
+    unique = {}
+    for params in [model_params(model_type)] + sample:
+        unique.setdefault(params_key(model_type, params), params)
+    return list(unique.values())
+
+
+# Folds per ticker at each rung: min_folds, min_folds * eta, ... up to every available fold
+def rung_sizes(n_folds, min_folds=1, eta=3):
+    sizes = []
+    size = min_folds
+    while size < n_folds:
+        sizes.append(size)
+        size *= eta
+    sizes.append(n_folds)
+    return sizes
+
+
+# Scored folds, one JSON line each, keyed by ticker, model, parameters, cutoff and horizon.
+# Failed fits are cached too, with an infinite error, so a bad setting is not retried.
+class TrialCache:
+    def __init__(self, path=TRIALS_PATH):
+        from backtest import read_checkpoint
+
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.rows = {self.key(row['ticker'], row['model'], row['params_key'], row['cutoff_index'], row['horizon']): row
+                     for row in read_checkpoint(path)}
+        self.handle = open(path, 'a')
+
+    @staticmethod
+    def key(ticker, model_type, key, cutoff, horizon):
+        return ticker, model_type, key, cutoff, horizon
+
+    def get(self, *key):
+        return self.rows.get(self.key(*key))
+
+    def put(self, row):
+        self.rows[self.key(row['ticker'], row['model'], row['params_key'], row['cutoff_index'], row['horizon'])] = row
+        self.handle.write(json.dumps(row) + '\n')
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+
+class Tuner:
+    def __init__(self, pool, cache, series_dir, lengths, initial=1500, step=250, horizon=30, eta=3, min_folds=1,
+                 max_folds=9):
+        self.pool = pool
+        self.cache = cache
+        self.series_dir = series_dir
+        self.lengths = lengths
+        self.initial = initial
+        self.step = step
+        self.horizon = horizon
+        self.eta = eta
+        self.min_folds = min_folds
+        self.max_folds = max_folds
+        self.fits = 0
+
+    # The most recent n cutoffs of a ticker: the folds closest to what the model will forecast
+    def cutoffs(self, ticker, n):
+        from backtest import cutoffs
+        return cutoffs(self.lengths[ticker], self.initial, self.step, self.horizon)[-n:]
+
+    # Score every candidate on n folds per ticker, fitting only the folds missing from the cache
+    def score(self, model_type, configs, tickers, n):
+        from backtest import run_fold
+
+        keys = [params_key(model_type, params) for params in configs]
+        futures = {}
+        for key, params in zip(keys, configs):
+            for ticker in tickers:
+                for cutoff in self.cutoffs(ticker, n):
+                    if self.cache.get(ticker, model_type, key, cutoff, self.horizon) is None:
+                        future = self.pool.submit(run_fold, self.series_dir, ticker, model_type, cutoff,
+                                                  self.horizon, params)
+                        futures[future] = (ticker, key, params, cutoff)
+        for future in as_completed(futures):
+            ticker, key, params, cutoff = futures[future]
+            try:
+                row = future.result()
+            except Exception as exc:
+                row = {'ticker': ticker, 'model': model_type, 'cutoff_index': cutoff, 'mae': float('inf'),
+                       'mape': float('inf'), 'error': repr(exc)}
+            self.cache.put({**row, 'params_key': key, 'params': params, 'horizon': self.horizon})
+        self.fits += len(futures)
+
+        scores = []
+        for key in keys:
+            mapes = [self.cache.get(ticker, model_type, key, cutoff, self.horizon)['mape']
+                     for ticker in tickers for cutoff in self.cutoffs(ticker, n)]
+            scores.append(float(np.mean(mapes)) if mapes else float('inf'))
+        return scores
+
+    # Successive halving over the candidates for one ticker or one sector. Tickers too short for
+    # a single fold are left out of a sector's score.
+    def tune(self, model_type, tickers, configs):
+        tickers = [ticker for ticker in tickers if self.cutoffs(ticker, 1)]
+        if not tickers:
+            raise ValueError(f"Not enough history for a {self.initial}-day window and a {self.horizon}-day fold")
+        n_folds = min(self.max_folds, min(len(self.cutoffs(ticker, self.max_folds)) for ticker in tickers))
+        sizes = rung_sizes(n_folds, min(self.min_folds, n_folds), self.eta)
+        for i, n in enumerate(sizes):
+            scores = self.score(model_type, configs, tickers, n)
+            ranked = sorted(zip(scores, range(len(configs))))
+            if i == len(sizes) - 1 or len(configs) == 1:
+                break
+            keep = max(1, -(-len(configs) // self.eta))
+            configs = [configs[index] for _, index in ranked[:keep]]
+        score, best = ranked[0]
+        return {'params': configs[best], 'mape': score, 'folds': n, 'tickers': list(tickers),
+                'default_mape': self.default_score(model_type, tickers, n), 'tuned': time.strftime('%Y-%m-%d')}
+
+    # The defaults' error on the same folds, from the cache whenever it was scored there
+    def default_score(self, model_type, tickers, n):
+        return self.score(model_type, [model_params(model_type)], tickers, n)[0]
+
+
+def read_best(path=BEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def write_best(best, path=BEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as handle:
+        json.dump(best, handle, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Winning parameters for a ticker: its own tuning result, else its sector's, else None
+# (the model's defaults). The file is re-read whenever it changes on disk.
+best_cache = {'mtime': None, 'best': {}}
+
+
+def tuned_params(ticker, model_type, path=BEST_PATH):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if mtime != best_cache['mtime']:
+        best_cache['best'], best_cache['mtime'] = read_best(path), mtime
+    winners = best_cache['best'].get(model_type, {})
+    entry = winners.get('tickers', {}).get(ticker) or winners.get('sectors', {}).get(SECTOR_OF.get(ticker))
+    return dict(entry['params']) if entry else None
+
+
+def run(model_types=(PROPHET,), tickers=(), sector_names=(), trials=27, eta=3, max_folds=9, initial=1500, step=250,
+        horizon=30, workers=None, threads_per_worker=1, store=None, seed=0):
+    from backtest import THREAD_VARIABLES, init_worker, share_series
+    from forecast_store import ForecastStore
+    from store import PriceStore
+
+    scopes = [('tickers', ticker, [ticker]) for ticker in dict.fromkeys(tickers)]
+    scopes += [('sectors', sector, list(sectors[sector])) for sector in dict.fromkeys(sector_names)]
+    universe = list(dict.fromkeys(ticker for _, _, members in scopes for ticker in members))
+
+    tmp = tempfile.mkdtemp(prefix='stock-tuning-')
+    series_dir = share_series(store or PriceStore(), universe, tmp)
+    lengths = {ticker: len(np.load(os.path.join(series_dir, f"{ticker}.y.npy"), mmap_mode='r')) for ticker in universe}
+
+    for name in THREAD_VARIABLES:
+        os.environ[name] = str(threads_per_worker)
+    best = read_best()
+    forecasts = ForecastStore()
+    cache = TrialCache()
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker, initargs=(threads_per_worker,)) as pool:
+            tuner = Tuner(pool, cache, series_dir, lengths, initial, step, horizon, eta, max_folds=max_folds)
+            for model_type in model_types:
+                configs = candidates(model_type, trials, seed)
+                for kind, name, members in scopes:
+                    began, fits = time.perf_counter(), tuner.fits
+                    try:
+                        result = tuner.tune(model_type, members, configs)
+                    except ValueError as exc:
+                        print(f"{name:<24} {model_type:<14} skipped ({exc})")
+                        continue
+                    best.setdefault(model_type, {}).setdefault(kind, {})[name] = result
+                    write_best(best)
+                    # Forecasts made with the old settings are dropped so they are refitted with the winner
+                    for ticker in members:
+                        forecasts.discard(ticker, model_type)
+                    print(f"{name:<24} {model_type:<14} MAPE {result['mape']:7.2%} (defaults {result['default_mape']:7.2%})"
+                          f"  {tuner.fits - fits:4d} fits  {time.perf_counter() - began:6.1f}s  {result['params']}")
+    finally:
+        cache.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tune Prophet/NeuralProphet hyperparameters with successive halving")
+    parser.add_argument('--models', nargs='*', default=[PROPHET], choices=list(SEARCH_SPACE))
+    parser.add_argument('--tickers', nargs='*', default=[], help="Tune each of these tickers on its own")
+    parser.add_argument('--sectors', nargs='*', default=[], choices=list(sectors),
+                        help="Tune one setting shared by every ticker of each sector")
+    parser.add_argument('--trials', type=int, default=27, help="Candidate settings, including the defaults")
+    parser.add_argument('--eta', type=int, default=3, help="Keep the best 1/eta candidates at each rung")
+    parser.add_argument('--max-folds', type=int, default=9, help="Folds per ticker at the last rung")
+    parser.add_argument('--initial', type=int, default=1500, help="Trading days in the first training window")
+    parser.add_argument('--step', type=int, default=250, help="Trading days between cutoffs")
+    parser.add_argument('--horizon', type=int, default=30, help="Trading days scored after each cutoff")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--csv-source', default=None, help="Read prices from a folder of <TICKER>_data.csv files")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if not args.tickers and not args.sectors:
+        parser.error("choose --tickers and/or --sectors")
+
+    from store import PriceStore, CsvProvider
+    store = PriceStore(CsvProvider(args.csv_source) if args.csv_source else None)
+    run(args.models, args.tickers, args.sectors, args.trials, args.eta, args.max_folds, args.initial, args.step,
+        args.horizon, args.workers, args.threads_per_worker, store, args.seed)
+    print(f"\nWinners written to {BEST_PATH}")
@@ -0,0 +1,69 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import Counter
+
+from config import PREWARM_DIR
+
+# Ticker popularity for the cache pre-warmer. Each app or API process counts the tickers it
+# is asked for in memory and now and then writes its running totals to
+# data/prewarm/usage/<host>-<pid>.json; the pre-warmer adds up the recent files to decide
+# which tickers to refresh first.
+
+USAGE_DIR = os.path.join(PREWARM_DIR, 'usage')
+# Seconds between writes of a process's counts, and age after which a file stops counting
+FLUSH_SECONDS = 60
+MAX_AGE_DAYS = 30
+
+lock = threading.Lock()
+counts = Counter()
+last_flush = {'at': time.monotonic()}
+
+
+def record(ticker, folder=USAGE_DIR):
+    with lock:
+        counts[ticker] += 1
+        if time.monotonic() - last_flush['at'] < FLUSH_SECONDS:
+            return
+        last_flush['at'] = time.monotonic()
+        snapshot = dict(counts)
+    try:
+        flush(snapshot, folder)
+    except OSError:
+        # Popularity is only a hint; never fail a page or a request over it
+        pass
+
+
+def flush(snapshot=None, folder=USAGE_DIR):
+    if snapshot is None:
+        with lock:
+            snapshot = dict(counts)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{socket.gethostname()}-{os.getpid()}.json")
+    with open(f"{path}.tmp", 'w') as handle:
+        json.dump(snapshot, handle)
+    os.replace(f"{path}.tmp", path)
+
+
+# Requests per ticker summed over the processes that wrote in the last max_age_days;
+# older files belong to processes long gone and are removed
+def popularity(folder=USAGE_DIR, max_age_days=MAX_AGE_DAYS):
+    totals = Counter()
+    if not os.path.isdir(folder):
+        return totals
+    oldest = time.time() - max_age_days * 86400
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if not name.endswith('.json'):
+            continue
+        try:
+            if os.path.getmtime(path) < oldest:
+                os.remove(path)
+                continue
+            with open(path) as handle:
+                totals.update(json.load(handle))
+        except (OSError, ValueError):
+            continue
+    return totals
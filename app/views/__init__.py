@@ -0,0 +1,2 @@
+# Pages of the Streamlit app. main.py imports only the page being shown, so each page's
+# dependencies (plotting, models, news clients) load the first time it is opened.
@@ -0,0 +1,87 @@
+import pandas as pd
+import streamlit as st
+
+import metrics
+import usage
+from analytics import ReturnsPanel, price_matrix
+from charts import price_chart
+from config import START
+from shared_prices import shared_prices
+from store import PriceStore
+
+# Price loading and plotting shared by the Visualization, Prediction, Dashboard and Portfolio pages
+
+
+# One price store per process, shared by every session
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+
+# Read prices from the local store, which only downloads the days it is missing
+@st.cache_data(ttl=3600)
+def cached_prices(ticker):
+    metrics.count('cache_misses_total', cache='load_data')
+    return get_price_store().load(ticker, START)
+
+
+def load_data(ticker):
+    metrics.count('cache_requests_total', cache='load_data')
+    usage.record(ticker)
+    with metrics.span('load_data'):
+        data = cached_prices(ticker)
+    metrics.observe('rows', len(data), stage='load_data')
+    return data
+
+
+# Cache key for the returns panel of a selection: the matrix version when the matrix covers
+# the selection and is as recent as the store (None sends the panel to the store), and the
+# store's latest date, so a new trading day or a new matrix builds a new panel
+def panel_version(tickers):
+    dates = [data['Date'].max() for data in map(cached_prices, tickers) if not data.empty]
+    as_of = max(dates) if dates else None
+    matrix = shared_prices()
+    fresh = (matrix is not None and all(ticker in matrix for ticker in tickers)
+             and (as_of is None or pd.Timestamp(matrix.dates[-1]) >= as_of))
+    return matrix.version if fresh else None, None if as_of is None else as_of.strftime("%Y-%m-%d")
+
+
+# Returns panel for a set of assets, built once per panel_version and reused for every date
+# range. Prices come from the shared memory-mapped matrix when it is fresh, else from the store.
+@st.cache_resource(max_entries=32)
+def get_returns_panel(tickers, version=(None, None)):
+    matrix = shared_prices() if version[0] is not None else None
+    if matrix is not None and matrix.version == version[0]:
+        return ReturnsPanel(tickers, matrix.dates, matrix.window(tickers, field='Adj Close'))
+    return ReturnsPanel(*price_matrix(get_price_store(), tickers))
+
+
+# Seconds between refreshes of the live intraday views
+INTRADAY_REFRESH = 2
+
+
+# One intraday feed per process: a background thread filling the per-ticker bar buffers
+# that every session reads. None when the source cannot start (e.g. no replay file yet).
+@st.cache_resource
+def get_intraday_feed():
+    from intraday import IntradayBook, IntradayFeed, make_source
+    try:
+        source, interval = make_source()
+    except FileNotFoundError:
+        return None
+    return IntradayFeed(source, IntradayBook(), interval)
+
+
+def intraday_status(feed):
+    if feed is None:
+        st.warning("No intraday source: create a replay file with `python app/intraday.py --synthetic` "
+                   "or set STOCK_APP_INTRADAY_SOURCE=yahoo.")
+    elif feed.error:
+        st.warning(f"Intraday feed error: {feed.error}")
+
+
+# Function to plot raw data, decimated to the chart's width over the visible range
+def plot_raw_data(data, fields=('Close',), x_range=None):
+    with metrics.span('plot_raw_data'):
+        fig = price_chart(data, fields, x_range)
+        st.plotly_chart(fig)
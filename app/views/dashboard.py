@@ -0,0 +1,74 @@
+import pandas as pd
+import streamlit as st
+
+import metrics
+from config import stocks
+from analytics import ReturnsPanel
+from views.common import (INTRADAY_REFRESH, get_intraday_feed, get_returns_panel, intraday_status,
+                          panel_version)
+
+
+# Returns since the oldest buffered bar, refreshed from the intraday feed every few seconds
+@st.fragment(run_every=INTRADAY_REFRESH)
+def live_returns(tickers, bar):
+    feed = get_intraday_feed()
+    intraday_status(feed)
+    if feed is None:
+        return
+    with metrics.span('intraday_returns'):
+        closes = feed.book.closes(tickers, bar)
+        if closes.empty:
+            st.info("Waiting for quotes...")
+            return
+        panel = ReturnsPanel(list(closes.columns), closes.index, closes.values.T)
+        df = panel.cumulative_returns()
+    st.write(f'Intraday returns for stocks: {tickers} ({bar} bars)')
+    st.line_chart(df)
+    st.dataframe(pd.DataFrame({'Last': feed.book.last_prices(tickers), 'Return': df.iloc[-1]}))
+
+
+def render():
+    st.title("My Stock Dashboard")
+
+    # Stock selector for the dashboard
+    multi_select_dropdown = st.multiselect("Pick your assets", stocks)
+
+    if st.toggle("Intraday (live)"):
+        from intraday import BAR_SECONDS
+        bar = st.radio("Bar size", list(BAR_SECONDS), index=1, horizontal=True)
+        if multi_select_dropdown:
+            live_returns(multi_select_dropdown, bar)
+        return
+
+    # Date input fields for the dashboard
+    start = st.date_input('Start', value=pd.to_datetime('2010-01-01'))
+    end = st.date_input('End', value=pd.to_datetime('today'))
+
+    # Only show chart if stocks are selected
+    if len(multi_select_dropdown) > 0:
+        # Returns and risk statistics from the local price store
+        with metrics.span('returns_panel'):
+            tickers = tuple(multi_select_dropdown)
+            panel = get_returns_panel(tickers, panel_version(tickers))
+        metrics.observe('rows', panel.prices.shape[1], stage='returns_panel')
+        with metrics.span('cumulative_returns'):
+            df = panel.cumulative_returns(start, end)
+            st.write(f'Returns for stocks: {multi_select_dropdown}')
+            st.line_chart(df)
+
+        st.subheader("Risk and return")
+        with metrics.span('summary'):
+            st.dataframe(panel.summary(start, end))
+
+        st.subheader("Rolling volatility (21 days, annualised)")
+        with metrics.span('rolling_volatility'):
+            st.line_chart(panel.rolling_volatility(21, start, end))
+
+        st.subheader("Drawdown")
+        with metrics.span('drawdown'):
+            st.line_chart(panel.drawdown(start, end))
+
+        if len(multi_select_dropdown) > 1:
+            st.subheader("Correlation of daily returns")
+            with metrics.span('correlation'):
+                st.dataframe(panel.correlation(start, end))
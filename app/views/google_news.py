@@ -0,0 +1,61 @@
+import streamlit as st
+
+import metrics
+from config import stocks
+from news_service import NewsService
+
+
+# One news service per process: pooled connections and cached results shared by every session
+@st.cache_resource
+def get_news_service():
+    return NewsService()
+
+
+# Function to get news headlines from Google News; None when the fetch failed
+def get_titles(search):
+    headlines = get_news_service().get_google_news([search])[search]
+    if isinstance(headlines, Exception):
+        st.error(f"Failed to load Google News: {headlines}")
+        return None
+    return headlines
+
+
+def render():
+    st.title("Google News Stock Search")
+
+    # Stock selector for news
+    selected_stock = st.selectbox("Select stock for news", stocks)
+    st.subheader(f"Latest Google News for {selected_stock}")
+
+    # Button to trigger news search
+    if st.button("Fetch News"):
+        st.write(f"Fetching news headlines for {selected_stock}...")
+
+        # Fetch news headlines from Google News
+        with metrics.span('google_news'):
+            headlines = get_titles(selected_stock)
+        metrics.observe('rows', len(headlines or []), stage='google_news')
+
+        if headlines:
+            st.success("News fetched successfully!")
+            for i, headline in enumerate(headlines, 1):
+                st.markdown(f"{i}. [{headline['title']}]({headline['link']})")
+        elif headlines is not None:
+            st.warning(f"No news headlines found for {selected_stock}.")
+
+    # Watchlist: every ticker is fetched concurrently over the shared connection pool
+    st.subheader("Watchlist")
+    watchlist = st.multiselect("Pick stocks to follow", stocks)
+    if watchlist and st.button("Fetch Watchlist News"):
+        with metrics.span('google_news_watchlist'):
+            news = get_news_service().get_google_news(watchlist)
+        failed = {ticker: news.pop(ticker) for ticker in watchlist if isinstance(news[ticker], Exception)}
+        metrics.observe('rows', sum(len(stories) for stories in news.values()), stage='google_news_watchlist')
+        for ticker, exc in failed.items():
+            st.error(f"Failed to load Google News for {ticker}: {exc}")
+        for ticker in watchlist:
+            if ticker in failed:
+                continue
+            with st.expander(f"{ticker} ({len(news[ticker])} headlines)"):
+                for i, headline in enumerate(news[ticker], 1):
+                    st.markdown(f"{i}. [{headline['title']}]({headline['link']})")
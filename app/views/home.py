@@ -0,0 +1,17 @@
+import streamlit as st
+
+
+def render():
+    st.title("Welcome to the Stock Prediction App")
+    st.write("""
+    This app allows you to predict stock prices using two models: **Prophet** and **NeuralProphet**, with a fast statistical **Baseline** for comparison.
+
+    ### Features:
+    - **Visualization**: Explore raw stock data with interactive visualizations.
+    - **Prophet**: Time-series forecasting developed by Facebook.
+    - **NeuralProphet**: Neural network-based time-series forecasting, per stock or as one global model for all stocks.
+    - **Baseline**: Drift, Holt, seasonal-naive and ridge forecasts computed for every stock at once.
+    - **Market News**: Get up-to-date news on your desired stock.
+    - **Personal Dashboard**: Compare your preferred stocks.
+    - **Portfolio**: Efficient frontier and simulated future values of a portfolio of your stocks.
+    """)
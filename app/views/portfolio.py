@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import metrics
+from charts import fan_chart, frontier_chart
+from config import stocks
+from portfolio import (QUANTILES, annual_moments, common_returns, frontier, random_portfolios, simulate,
+                       terminal_summary, value_bands)
+from views.common import get_returns_panel, panel_version
+
+METHODS = {'gbm': "Geometric Brownian motion", 'bootstrap': "Block bootstrap of history"}
+# Fewest days every asset traded in the estimation window for the moments to mean anything
+MIN_DAYS = 60
+
+
+# Annualised moments and the random-portfolio frontier for a selection and estimation window
+@st.cache_data(max_entries=16)
+def get_frontier(tickers, start, end, n, risk_free, seed, version=(None, None)):
+    panel = get_returns_panel(tickers, version)
+    mean, cov = annual_moments(common_returns(panel, start, end))
+    cloud = random_portfolios(mean, cov, n, risk_free, seed)
+    return mean, cov, cloud, frontier(cloud['returns'], cloud['volatility'])
+
+
+# Percentile bands and final-value statistics of simulated paths; the paths themselves are
+# reduced here, so only a few hundred numbers are cached
+@st.cache_data(max_entries=16)
+def get_simulation(tickers, weights, start, end, days, paths, method, block, seed, version=(None, None)):
+    panel = get_returns_panel(tickers, version)
+    grid, values = simulate(common_returns(panel, start, end, log=True), weights, days, paths, method, block, seed)
+    return grid, value_bands(values), terminal_summary(values)
+
+
+def portfolio_stats(weights, mean, cov, risk_free):
+    expected = float(weights @ mean)
+    volatility = float(np.sqrt(weights @ cov @ weights))
+    return {'Annual return': expected, 'Annual volatility': volatility,
+            'Sharpe': (expected - risk_free) / volatility if volatility > 0 else np.nan}
+
+
+def render():
+    st.title("Portfolio")
+
+    tickers = tuple(st.multiselect("Pick your assets", stocks))
+    start = st.date_input('Estimate from', value=pd.Timestamp.today().normalize() - pd.DateOffset(years=5))
+    end = st.date_input('Estimate to', value=pd.to_datetime('today'))
+
+    n_portfolios = st.sidebar.select_slider("Random portfolios", [10_000, 25_000, 50_000, 100_000], value=50_000)
+    risk_free = st.sidebar.number_input("Risk-free rate", 0.0, 0.2, 0.0, step=0.005, format="%.3f")
+    seed = int(st.sidebar.number_input("Random seed", 0, 2 ** 31 - 1, 0))
+
+    if len(tickers) < 2:
+        st.info("Pick at least two assets to build a portfolio.")
+        return
+    if start >= end:
+        st.warning("'Estimate from' must be before 'Estimate to'.")
+        return
+
+    version = panel_version(tickers)
+    # Assets without any prices (e.g. delisted symbols) are left out rather than emptying the window
+    panel = get_returns_panel(tickers, version)
+    missing = [ticker for ticker, traded in zip(panel.tickers, panel.valid.any(axis=1)) if not traded]
+    missing += [ticker for ticker in tickers if ticker not in panel.tickers]
+    if missing:
+        st.warning(f"No price data for {', '.join(missing)}; left out of the portfolio.")
+        tickers = tuple(ticker for ticker in tickers if ticker not in missing)
+        if len(tickers) < 2:
+            return
+        panel = get_returns_panel(tickers, version)
+    days = len(common_returns(panel, start, end))
+    if days < MIN_DAYS:
+        st.warning(f"Only {days} days in the window on which every asset traded; at least {MIN_DAYS} are "
+                   f"needed. Widen the estimation window or change the assets.")
+        return
+    with metrics.span('frontier'):
+        mean, cov, cloud, edge = get_frontier(tickers, start, end, n_portfolios, risk_free, seed, version)
+    metrics.observe('rows', n_portfolios, stage='frontier')
+
+    picks = {'Max Sharpe': cloud['max_sharpe'], 'Min volatility': cloud['min_volatility'],
+             'Equal weight': np.full(len(tickers), 1 / len(tickers))}
+    stats = {name: portfolio_stats(weights, mean, cov, risk_free) for name, weights in picks.items()}
+    with metrics.span('plot_frontier'):
+        st.plotly_chart(frontier_chart(cloud, edge, {name: (row['Annual volatility'], row['Annual return'])
+                                                      for name, row in stats.items()}))
+    st.subheader("Weights")
+    st.dataframe(pd.concat([pd.DataFrame(picks, index=list(tickers)), pd.DataFrame(stats)]).round(4))
+
+    st.subheader("Simulation")
+    choice = st.radio("Portfolio", list(picks), horizontal=True)
+    method = st.radio("Method", list(METHODS), format_func=METHODS.get, horizontal=True)
+    days = st.slider("Trading days ahead", 5, 1260, 252)
+    paths = st.select_slider("Paths", [1_000, 5_000, 10_000, 20_000], value=5_000)
+    block = st.slider("Block length (days)", 5, 60, 20) if method == 'bootstrap' else 20
+
+    weights = tuple(float(w) for w in picks[choice])
+    with metrics.span('simulate'):
+        grid, bands, summary = get_simulation(tickers, weights, start, end, days, paths, method, block, seed, version)
+    metrics.observe('rows', paths, stage='simulate')
+
+    dates = pd.bdate_range(pd.Timestamp(end) + pd.Timedelta(days=1), periods=days)[grid - 1]
+    with metrics.span('plot_simulation'):
+        st.plotly_chart(fan_chart(dates, bands, QUANTILES))
+    st.dataframe(pd.Series(summary, name=choice).to_frame().style.format('{:.2%}'))
@@ -0,0 +1,146 @@
+import json
+
+import streamlit as st
+
+import metrics
+from charts import forecast_chart, components_chart
+from config import stocks
+from models import (PROPHET, NEURALPROPHET, NEURALPROPHET_GLOBAL, make_train_frame, make_forecast, model_params,
+                    standard_forecast)
+from registry import ModelRegistry, forecast_params
+from shared_prices import FIELDS, shared_prices
+from baseline import METHODS as BASELINE_METHODS, BaselineForecaster
+from forecast_store import ForecastStore, MAX_YEARS, as_of_date, comparable, horizon
+from views.common import load_data, plot_raw_data
+
+
+# Fitted models survive reruns and restarts in the on-disk registry
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry()
+
+
+# Precomputed forecasts written by the batch engine and by earlier on-demand fits
+@st.cache_resource
+def get_forecast_store():
+    return ForecastStore()
+
+
+# Forecast for the longest horizon, served from the forecast store and fitted through the registry on a miss.
+# `settings` (the hyperparameters as JSON) is part of the cache key, so tuning a ticker retires its cached forecasts.
+@st.cache_data(ttl=3600)
+def cached_forecast(ticker, model_type, as_of, settings):
+    store = get_forecast_store()
+    params = json.loads(settings)
+    with metrics.span('forecast_store'):
+        forecast = store.get(ticker, model_type, as_of, params)
+    if forecast is not None:
+        return forecast
+
+    metrics.count('cache_misses_total', cache='forecast_store')
+    if model_type == NEURALPROPHET_GLOBAL:
+        # Training on the whole universe takes far too long for a page view, so the global
+        # forecasts only come from the offline jobs. Raised, not returned, so it is not cached.
+        raise LookupError("The global NeuralProphet has not been built for today's data yet. It is trained offline "
+                          "by `python app/prewarm.py --models neuralprophet_global` or "
+                          "`python app/batch_forecast.py --models neuralprophet_global --publish`.")
+    df_train = make_train_frame(load_data(ticker))
+    with metrics.span('fit'):
+        m = get_model_registry().get_or_fit(ticker, model_type, df_train, params)
+    with metrics.span('predict'):
+        forecast = standard_forecast(make_forecast(m, model_type, df_train, MAX_YEARS * 365), model_type)
+    metrics.set_gauges('model_registry', get_model_registry().stats())
+    store.put(ticker, model_type, as_of, forecast, params)
+    return forecast
+
+
+# Counted out here, since the body of a cached function only runs when Streamlit's cache misses.
+# A miss is a forecast that had to be fitted, whichever of the two caches it was not found in.
+def get_forecast(ticker, model_type, as_of, settings):
+    metrics.count('cache_requests_total', cache='forecast_store')
+    return cached_forecast(ticker, model_type, as_of, settings)
+
+
+# Baseline forecasters: one for the whole shared price matrix, fitted in a single batched pass,
+# and a single-ticker one for when the matrix is missing the ticker or is older than the store
+@st.cache_resource
+def get_universe_baseline(matrix_version):
+    matrix = shared_prices()
+    return BaselineForecaster(matrix.tickers, matrix.dates, matrix.values[FIELDS.index('Close')])
+
+
+@st.cache_resource(max_entries=16)
+def get_ticker_baseline(ticker, as_of):
+    data = load_data(ticker)
+    return BaselineForecaster([ticker], data['Date'].values, data['Close'].values[None, :])
+
+
+def baseline_forecast(ticker, data, method, period):
+    matrix = shared_prices()
+    if matrix is not None and ticker in matrix and matrix.dates[-1] >= data['Date'].max():
+        forecaster = get_universe_baseline(matrix.version)
+    else:
+        forecaster = get_ticker_baseline(ticker, as_of_date(data))
+    return forecaster.forecast(ticker, method, period)
+
+
+def render():
+    st.title("Stock Prediction")
+
+    # User choice for prediction model
+    choice = st.sidebar.selectbox("Choose Prediction Model", ('Predict with Prophet', 'Predict with NeuralProphet',
+                                                              'Predict with NeuralProphet (global)', 'Predict with Baseline'))
+    if choice == 'Predict with Baseline':
+        method = st.sidebar.selectbox("Baseline method", list(BASELINE_METHODS), format_func=BASELINE_METHODS.get)
+
+    selected_stocks = st.selectbox("Select dataset for prediction", stocks)
+
+    n_years = st.slider("Years of prediction:", 0, 4)
+    period = n_years * 365
+
+    data_load_state = st.text("Loading data...")
+    data = load_data(selected_stocks)
+    data_load_state.text("Loading data ... DONE!")
+
+    st.subheader("Raw data")
+    st.write(data.tail())
+
+    plot_raw_data(data)
+
+    as_of = as_of_date(data)
+    if choice == 'Predict with Baseline':
+        st.subheader(f"Baseline Model: {BASELINE_METHODS[method]}")
+        with metrics.span('baseline'):
+            forecast = baseline_forecast(selected_stocks, data, method, period)
+    else:
+        model_type = {'Predict with Prophet': PROPHET, 'Predict with NeuralProphet': NEURALPROPHET,
+                      'Predict with NeuralProphet (global)': NEURALPROPHET_GLOBAL}[choice]
+        st.subheader({PROPHET: "Prophet Model", NEURALPROPHET: "NeuralProphet Model",
+                      NEURALPROPHET_GLOBAL: "NeuralProphet Model (trained on all stocks)"}[model_type])
+        # Read the precomputed forecast for the settings a fit would use now (the tuned ones when
+        # tuning has run), fitting on demand only when none exists for this data and these settings
+        settings = json.dumps(comparable(forecast_params(selected_stocks, model_type)), sort_keys=True)
+        try:
+            with metrics.span('get_forecast'):
+                forecast = horizon(get_forecast(selected_stocks, model_type, as_of, settings), as_of, period)
+        except LookupError as exc:
+            st.warning(str(exc))
+            return
+        stored = (get_forecast_store().info(selected_stocks, model_type, as_of) or {}).get('params')
+        if stored is not None and stored != comparable(model_params(model_type)):
+            st.caption(f"Tuned settings: {stored}")
+    metrics.observe('rows', len(forecast), stage='forecast')
+
+    st.subheader("Forecast data")
+    st.write(forecast.tail())
+
+    # Plot forecast data
+    with metrics.span('plot_forecast'):
+        fig1 = forecast_chart(data, forecast)
+        st.plotly_chart(fig1)
+
+    # Plot forecast components
+    st.write("Forecast component")
+    with metrics.span('plot_components'):
+        fig2 = components_chart(forecast)
+        st.plotly_chart(fig2)
@@ -0,0 +1,57 @@
+import streamlit as st
+from PIL import Image
+
+import metrics
+from charts import PRICE_FIELDS, RANGES, x_range_for
+from config import stocks
+from views.common import INTRADAY_REFRESH, get_intraday_feed, intraday_status, load_data, plot_raw_data
+
+
+# Live chart of the intraday bars, redrawn on its own every few seconds
+@st.fragment(run_every=INTRADAY_REFRESH)
+def live_price_chart(ticker, bar, fields):
+    feed = get_intraday_feed()
+    intraday_status(feed)
+    if feed is None:
+        return
+    with metrics.span('intraday_frame'):
+        bars = feed.book.frame(ticker, bar)
+    if bars.empty:
+        st.info(f"Waiting for {ticker} quotes...")
+        return
+    plot_raw_data(bars, fields)
+    st.caption(f"{len(bars)} {bar} bars, last at {bars['Date'].iloc[-1]:%Y-%m-%d %H:%M}")
+
+
+def render():
+    st.title("Stock Data Visualization")
+    selected_stocks = st.selectbox("Select dataset for visualization", stocks)
+
+    # Intraday mode: live OHLCV bars instead of the daily history
+    if st.toggle("Intraday (live)"):
+        from intraday import BAR_SECONDS
+        bar = st.radio("Bar size", list(BAR_SECONDS), horizontal=True)
+        fields = st.multiselect("Fields to plot", PRICE_FIELDS, default=['Close'])
+        live_price_chart(selected_stocks, bar, fields)
+        return
+
+    data_load_state = st.text("Loading data...")
+    data = load_data(selected_stocks)
+    data_load_state.text("Loading data ... DONE!")
+
+    st.subheader("Raw data")
+    st.write(data.tail())
+
+    # Plot raw data: any of the OHLCV fields over the chosen range
+    fields = st.multiselect("Fields to plot", PRICE_FIELDS, default=['Close'])
+    visible = st.radio("Range", list(RANGES), index=len(RANGES) - 1, horizontal=True)
+    plot_raw_data(data, fields, x_range_for(data['Date'], visible))
+
+    # Tableau Visuals
+    st.subheader("Stock Price Dashboard Visualization")
+    image = Image.open("app/tableau_dashboard.png")
+    st.image(image, caption="Stock Price Tableau Dashboard", use_column_width=False, width=800)
+    st.markdown("""
+    **[Click here to view the Tableau Dashboard](https://public.tableau.com/views/Stock-price-predictor-ml/Dashboard1?:language=en-GB&publish=yes&:sid=&:redirect=auth&:display_count=n&:origin=viz_share_link)**
+    Please note that this will open the dashboard in a new tab.
+    """)
@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Offline inputs for the benchmarks: synthetic OHLCV files laid out like
+# data/raw/<TICKER>_data.csv and a saved copy of the Yahoo market news page
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+YAHOO_HTML = os.path.join(FIXTURE_DIR, 'yahoo_news.html')
+
+
+# One geometric random walk per ticker over business days, with a fixed seed so every
+# run times exactly the same data
+def synthetic_prices(ticker, start='2010-01-01', end='2024-12-31', seed=0):
+    dates = pd.bdate_range(start, end)
+    rng = np.random.default_rng([seed, sum(map(ord, ticker))])
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, len(dates))))
+    opening = close * np.exp(rng.normal(0, 0.004, len(dates)))
+    spread = np.abs(rng.normal(0, 0.01, len(dates)))
+    return pd.DataFrame({
+        'Date': dates,
+        'Open': opening,
+        'High': np.maximum(opening, close) * (1 + spread),
+        'Low': np.minimum(opening, close) * (1 - spread),
+        'Close': close,
+        'Adj Close': close,
+        'Volume': rng.integers(1_000_000, 50_000_000, len(dates)),
+    })
+
+
+def write_prices(folder, tickers, start='2010-01-01', end='2024-12-31', seed=0):
+    os.makedirs(folder, exist_ok=True)
+    for ticker in tickers:
+        data = synthetic_prices(ticker, start, end, seed)
+        data.to_csv(os.path.join(folder, f"{ticker}_data.csv"), index=False, date_format='%Y-%m-%d')
+    return folder
+
+
+def yahoo_html():
+    with open(YAHOO_HTML, encoding='utf-8') as handle:
+        return handle.read()
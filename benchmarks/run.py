@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from importlib import metadata
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'app'))
+
+import pandas as pd
+
+from config import stocks
+from fixtures import write_prices, yahoo_html
+
+# Offline benchmarks of the app's hot paths on synthetic prices and a saved news page.
+# Results go to a JSON file and are compared with a stored baseline, so upgrades of
+# pandas, prophet or torch that slow the app down show up as regressions.
+#
+#   python benchmarks/run.py                      # run and compare with benchmarks/baseline.json
+#   python benchmarks/run.py --only load news     # a subset, by name prefix
+#   python benchmarks/run.py --save-baseline      # accept this run as the new baseline
+
+BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Packages whose versions are recorded with every run
+PACKAGES = ['numpy', 'pandas', 'pyarrow', 'plotly', 'streamlit', 'beautifulsoup4', 'prophet', 'neuralprophet', 'torch']
+
+
+class Skip(Exception):
+    pass
+
+
+def require(module):
+    try:
+        __import__(module)
+    except ImportError:
+        raise Skip(f"{module} is not installed")
+
+
+# The Dashboard's original cumulative return calculation (app/dashboard.py), kept as the reference
+def relative_return(df):
+    relative_returns = df.pct_change()
+    cumulative_return = (1 + relative_returns).cumprod() - 1
+    cumulative_return = cumulative_return.fillna(0)
+    return cumulative_return
+
+
+# Each benchmark prepares its inputs from the shared context and returns the call to time
+
+def bench_load_cold(ctx):
+    from store import PriceStore, CsvProvider
+
+    # First load of a ticker: read the CSV and write the Parquet store
+    def call():
+        folder = tempfile.mkdtemp(dir=ctx['tmp'])
+        PriceStore(CsvProvider(ctx['raw']), folder).load(ctx['ticker'])
+        shutil.rmtree(folder)
+    return call
+
+
+def bench_load_warm(ctx):
+    store = ctx['store']
+    store.load(ctx['ticker'])
+    return lambda: store.load(ctx['ticker'])
+
+
+def fit_predict(ctx, model_type):
+    from models import make_train_frame, fit_model, make_forecast
+
+    df_train = make_train_frame(ctx['data'])
+
+    # Same sequence as the Prediction page: ds/y frame, fit, one year ahead, predict
+    def call():
+        m = fit_model(model_type, df_train)
+        make_forecast(m, model_type, df_train, 365)
+    return call
+
+
+def bench_prophet(ctx):
+    from models import PROPHET
+    require('prophet')
+    return fit_predict(ctx, PROPHET)
+
+
+def bench_neuralprophet(ctx):
+    from models import NEURALPROPHET
+    require('neuralprophet')
+    return fit_predict(ctx, NEURALPROPHET)
+
+
+def bench_relative_return(ctx):
+    frame = ctx['wide']
+    return lambda: relative_return(frame)
+
+
+def bench_returns_panel(ctx):
+    from analytics import ReturnsPanel
+
+    frame = ctx['wide']
+    start, end = frame.index[0], frame.index[-1]
+    return lambda: ReturnsPanel(list(frame.columns), frame.index, frame.values.T).cumulative_returns(start, end)
+
+
+def bench_portfolio_frontier(ctx):
+    from analytics import ReturnsPanel
+    from portfolio import annual_moments, common_returns, frontier, random_portfolios
+
+    frame = ctx['wide']
+    panel = ReturnsPanel(list(frame.columns), frame.index, frame.values.T)
+
+    def call():
+        cloud = random_portfolios(*annual_moments(common_returns(panel)), 50_000)
+        frontier(cloud['returns'], cloud['volatility'])
+    return call
+
+
+# The Portfolio page's default simulation: one year ahead, 5,000 paths of every panel ticker
+def simulate_paths(ctx, method):
+    from analytics import ReturnsPanel
+    from portfolio import common_returns, simulate
+
+    frame = ctx['wide']
+    history = common_returns(ReturnsPanel(list(frame.columns), frame.index, frame.values.T), log=True)
+    weights = [1 / len(frame.columns)] * len(frame.columns)
+    return lambda: simulate(history, weights, 252, 5_000, method)
+
+
+def bench_portfolio_gbm(ctx):
+    return simulate_paths(ctx, 'gbm')
+
+
+def bench_portfolio_bootstrap(ctx):
+    return simulate_paths(ctx, 'bootstrap')
+
+
+# Building the figure plot_raw_data hands to Streamlit, which is not running here
+def bench_plot_raw_data(ctx):
+    from charts import price_chart
+    return lambda: price_chart(ctx['data'], ('Close',))
+
+
+# A long intraday-like history: the decimated chart should cost about the same as a daily one
+def bench_plot_long_history(ctx):
+    from charts import price_chart
+
+    data = ctx['data']
+    long = data.loc[data.index.repeat(100)].reset_index(drop=True)
+    long['Date'] = pd.date_range(data['Date'].iloc[0], periods=len(long), freq='min')
+    return lambda: price_chart(long, ['Open', 'High', 'Low', 'Close', 'Volume'])
+
+
+def bench_news_parse(ctx):
+    from news_service import parse_yahoo_page
+    html = yahoo_html()
+    return lambda: parse_yahoo_page(html)
+
+
+def bench_news_index(ctx):
+    from news_service import parse_yahoo_page
+    from ticker_index import TickerIndex
+
+    stories = parse_yahoo_page(yahoo_html())
+    index = TickerIndex()
+    return lambda: index.index(stories)
+
+
+# name -> (benchmark, repeats); model fits are slow enough that a few repeats suffice
+BENCHMARKS = {
+    'load.cold': (bench_load_cold, 10),
+    'load.warm': (bench_load_warm, 50),
+    'fit_predict.prophet': (bench_prophet, 3),
+    'fit_predict.neuralprophet': (bench_neuralprophet, 1),
+    'dashboard.relative_return': (bench_relative_return, 50),
+    'dashboard.returns_panel': (bench_returns_panel, 50),
+    'portfolio.frontier': (bench_portfolio_frontier, 10),
+    'portfolio.simulate_gbm': (bench_portfolio_gbm, 5),
+    'portfolio.simulate_bootstrap': (bench_portfolio_bootstrap, 5),
+    'plot.raw_data': (bench_plot_raw_data, 20),
+    'plot.long_history': (bench_plot_long_history, 10),
+    'news.parse_yahoo': (bench_news_parse, 20),
+    'news.index_tickers': (bench_news_index, 100),
+}
+
+
+def make_context(tmp, n_tickers):
+    from store import PriceStore, CsvProvider
+
+    tickers = list(dict.fromkeys(stocks))[:n_tickers]
+    raw = write_prices(os.path.join(tmp, 'raw'), tickers)
+    store = PriceStore(CsvProvider(raw), os.path.join(tmp, 'store'))
+    frames = {ticker: store.load(ticker) for ticker in tickers}
+    wide = pd.DataFrame({ticker: data.set_index('Date')['Adj Close'] for ticker, data in frames.items()})
+    return {'tmp': tmp, 'raw': raw, 'store': store, 'ticker': tickers[0], 'data': frames[tickers[0]],
+            'tickers': tickers, 'wide': wide}
+
+
+def time_call(call, repeats):
+    call()  # warm-up: imports, caches and first-touch allocations are not timed
+    times = []
+    for _ in range(repeats):
+        began = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - began)
+    return {'median': statistics.median(times), 'min': min(times), 'mean': statistics.fmean(times),
+            'repeats': repeats}
+
+
+def versions():
+    found = {}
+    for package in PACKAGES:
+        try:
+            found[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            found[package] = None
+    return found
+
+
+def run(names, n_tickers, repeat_scale=1.0):
+    results = {}
+    tmp = tempfile.mkdtemp(prefix='stock-bench-')
+    try:
+        ctx = make_context(tmp, n_tickers)
+        for name in names:
+            bench, repeats = BENCHMARKS[name]
+            try:
+                results[name] = time_call(bench(ctx), max(1, round(repeats * repeat_scale)))
+                print(f"{name:<28} {results[name]['median'] * 1000:10.2f} ms")
+            except Skip as reason:
+                results[name] = {'skipped': str(reason)}
+                print(f"{name:<28} {'skipped':>13}  ({reason})")
+            except Exception as exc:
+                # A benchmark that breaks (e.g. after an incompatible upgrade) is reported, not fatal
+                results[name] = {'error': repr(exc)}
+                print(f"{name:<28} {'FAILED':>13}  ({exc!r})")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count(),
+            'tickers': n_tickers,
+            'rows_per_ticker': len(ctx['data']),
+            'packages': versions(),
+        },
+        'results': results,
+    }
+
+
+# Best time of each benchmark against the baseline (the fastest run is the least disturbed
+# by the rest of the machine); slower than 1 + tolerance is a regression. A benchmark that
+# has no timing on either side (skipped, failed or never recorded) also fails the comparison,
+# so a missing package or baseline entry cannot pass unnoticed.
+def compare(report, baseline, tolerance):
+    regressions = []
+    print(f"\n{'benchmark (best of N)':<28} {'baseline':>12} {'now':>12} {'ratio':>7}")
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name, {})
+        if 'min' not in result or 'min' not in before:
+            side, entry = ('baseline', before) if 'min' not in before else ('this run', result)
+            reason = entry.get('skipped') or entry.get('error') or 'no entry'
+            print(f"{name:<28} not compared: no timing in the {side} ({reason})")
+            regressions.append(name)
+            continue
+        ratio = result['min'] / before['min']
+        flag = '  REGRESSION' if ratio > 1 + tolerance else ''
+        print(f"{name:<28} {before['min'] * 1000:10.2f}ms {result['min'] * 1000:10.2f}ms {ratio:7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+
+    changed = {package: (version, report['meta']['packages'].get(package))
+               for package, version in baseline['meta'].get('packages', {}).items()
+               if version != report['meta']['packages'].get(package)}
+    for package, (before, now) in changed.items():
+        print(f"{package} changed since the baseline: {before} -> {now}")
+    return regressions
+
+
+def write_json(report, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump(report, handle, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the app's load, fit, predict, dashboard and news paths")
+    parser.add_argument('--only', nargs='*', default=None, help="Benchmark names or name prefixes to run")
+    parser.add_argument('--tickers', type=int, default=20, help="Synthetic tickers in the dashboard panel")
+    parser.add_argument('--repeat-scale', type=float, default=1.0, help="Multiply every benchmark's repeat count")
+    parser.add_argument('--output', default=None, help="Results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Allowed slowdown before failing, as a fraction; well above run-to-run noise")
+    parser.add_argument('--save-baseline', action='store_true', help="Write this run to the baseline file")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS
+             if args.only is None or any(name.startswith(prefix) for prefix in args.only)]
+    report = run(names, args.tickers, args.repeat_scale)
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    write_json(report, output)
+    print(f"\nResults written to {output}")
+
+    if args.save_baseline:
+        write_json(report, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        if regressions:
+            print(f"\nSlower than the baseline or not compared: {', '.join(regressions)}")
+            raise SystemExit(1)
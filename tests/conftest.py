@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app imports its modules by bare name (streamlit run app/main.py), so tests do too
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
@@ -0,0 +1,14 @@
+from forecast_store import ForecastStore
+
+
+def test_prune_keeps_the_newest_as_of_dates_and_outputs(tmp_path):
+    for day in ('2024-03-04', '2024-03-05', '2024-03-06'):
+        (tmp_path / day / 'prophet').mkdir(parents=True)
+        (tmp_path / day / 'prophet' / 'AAPL.parquet').write_bytes(b'')
+        (tmp_path / f'forecasts_{day}.parquet').write_bytes(b'')
+    (tmp_path / 'all.parquet').write_bytes(b'')
+    store = ForecastStore(str(tmp_path))
+    store.prune(keep=2)
+    assert store.as_of_dates() == ['2024-03-05', '2024-03-06']
+    assert sorted(path.name for path in tmp_path.glob('*.parquet')) == [
+        'all.parquet', 'forecasts_2024-03-05.parquet', 'forecasts_2024-03-06.parquet']
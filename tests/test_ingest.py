@@ -0,0 +1,35 @@
+import pandas as pd
+
+from ingest import fetch_batch
+from store import empty_frame
+
+
+# Rate-limits the whole first request by returning empty frames, as Yahoo does; FB is
+# delisted and never has any bars
+class FlakyProvider:
+    def __init__(self, limited=1):
+        self.limited = limited
+        self.requests = []
+
+    def fetch_many(self, tickers, start, end):
+        self.requests.append(list(tickers))
+        bars = pd.DataFrame({'Date': [pd.Timestamp(start)], 'Close': [1.0]})
+        limited = len(self.requests) <= self.limited
+        return {ticker: empty_frame() if limited or ticker == 'FB' else bars for ticker in tickers}
+
+
+def test_a_rate_limited_batch_is_retried():
+    provider = FlakyProvider()
+    frames, attempts = fetch_batch(provider, ['AAPL', 'MSFT'], '2024-01-02', '2024-01-03', backoff=0)
+    assert provider.requests == [['AAPL', 'MSFT'], ['AAPL', 'MSFT']]
+    assert sorted(frames) == ['AAPL', 'MSFT']
+    assert attempts == {'AAPL': 2, 'MSFT': 2}
+
+
+def test_a_ticker_empty_next_to_data_is_dead_for_the_run():
+    provider, dead = FlakyProvider(limited=0), set()
+    frames, attempts = fetch_batch(provider, ['AAPL', 'FB'], '2024-01-02', '2024-01-03', backoff=0, dead=dead)
+    assert provider.requests == [['AAPL', 'FB']]
+    assert sorted(frames) == ['AAPL'] and dead == {'FB'}
+    fetch_batch(provider, ['FB', 'MSFT'], '2024-01-02', '2024-01-03', backoff=0, dead=dead)
+    assert provider.requests[-1] == ['MSFT']
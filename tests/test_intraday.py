@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from intraday import IntradayBook, ReplaySource
+
+
+def write_replay(path):
+    times = pd.date_range('2024-03-04 09:30', periods=3, freq='1min')
+    pd.DataFrame({'Datetime': times, 'Ticker': 'AAPL', 'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5,
+                  'Volume': 10.0}).to_csv(path, index=False)
+
+
+def test_looping_replay_keeps_adding_bars(tmp_path):
+    path = tmp_path / 'replay.csv'
+    write_replay(path)
+    source = ReplaySource(path, speed=1e9, loop=True)
+    book = IntradayBook(['AAPL'])
+
+    for expected in (3, 6):
+        quotes = source.poll()
+        assert len(quotes) == 3
+        book.add_many(quotes)
+        minutes = book.buffers['AAPL']['1m']
+        assert minutes.size == expected
+        assert minutes.dropped == 0
+
+    days = book.frame('AAPL', '1d')
+    assert len(days) == 2
+    assert np.array_equal(days['Volume'].values, [30.0, 30.0])
+    # The second pass lands on the same weekday a week later
+    assert (days['Date'].iloc[1] - days['Date'].iloc[0]) == pd.Timedelta(days=7)
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+from prewarm import download_end, refresh_batch
+from store import CsvProvider, PriceStore, empty_frame
+
+
+def test_closing_bar_is_only_requested_after_the_close():
+    # 15:00 and 22:30 UTC are 10:00 and 17:30 in New York on a Friday
+    assert download_end(datetime(2024, 3, 8, 15, 0, tzinfo=timezone.utc)) == '2024-03-08'
+    assert download_end(datetime(2024, 3, 8, 22, 30, tzinfo=timezone.utc)) == '2024-03-09'
+    # Saturday: no session, no bar of the day
+    assert download_end(datetime(2024, 3, 9, 22, 0, tzinfo=timezone.utc)) == '2024-03-09'
+
+
+# Counts requests; FB is delisted, so it never has any bars
+class CountingProvider(CsvProvider):
+    def __init__(self, folder):
+        super().__init__(folder)
+        self.requests = 0
+
+    def fetch_many(self, tickers, start, end):
+        self.requests += 1
+        return {ticker: empty_frame() if ticker == 'FB' else self.fetch(ticker, start, end) for ticker in tickers}
+
+
+def test_an_empty_top_up_is_not_retried(tmp_path):
+    (tmp_path / 'raw').mkdir()
+    (tmp_path / 'raw' / 'AAPL_data.csv').write_text(
+        "Date,Open,High,Low,Close,Adj Close,Volume\n2024-03-07,1,1,1,1,1,100\n2024-03-08,2,2,2,2,2,100\n")
+    provider = CountingProvider(str(tmp_path / 'raw'))
+    live, staged = PriceStore(provider, str(tmp_path / 'live')), PriceStore(provider, str(tmp_path / 'staged'))
+    report = refresh_batch(provider, ['AAPL', 'FB'], live, staged, '2024-03-09', retries=3, backoff=60)
+    assert provider.requests == 1
+    assert [(row['ticker'], row['as_of'], row['error']) for row in report] == [('AAPL', '2024-03-08', None),
+                                                                              ('FB', None, None)]
@@ -0,0 +1,20 @@
+import multiprocessing
+import time
+
+from registry import ModelRegistry
+
+
+def add_entries(folder, worker, count):
+    registry = ModelRegistry(folder)
+    for i in range(count):
+        with registry.updating() as index:
+            index[f"{worker}-{i}"] = {'model': 'prophet', 'size': 1, 'last_access': time.time()}
+
+
+def test_concurrent_writers_keep_each_others_entries(tmp_path):
+    processes = [multiprocessing.Process(target=add_entries, args=(str(tmp_path), worker, 25)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert len(ModelRegistry(str(tmp_path)).read_index()) == 100